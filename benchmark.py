@@ -0,0 +1,606 @@
+# benchmark.py
+# Замеры производительности и сверочные проверки движка cron_task.py
+#
+#   python benchmark.py                              # все замеры, наборы 1k/10k/100k задач
+#   python benchmark.py --sizes 1000 --json out.json # результаты в JSON
+#   python benchmark.py --compare old.json           # сравнить с прошлым прогоном
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from croniter import croniter
+
+import cron_task
+
+TASKS_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cron_task.json")
+
+
+@contextlib.contextmanager
+def isolated_section(tasks_source=TASKS_SOURCE):
+    """Отдельный каталог для замера: свой LOG_DIR, копия файла задач и свой фоновый логгер
+
+    Замер не пишет в настоящие log/ и cron_task.json (load_tasks сохраняет
+    файл, если выдаёт ID) и не зависит от того, остановил ли логгер предыдущий.
+    """
+    saved = cron_task.LOG_DIR, cron_task.TASKS_FILE, cron_task.LOG_TO_CONSOLE, list(cron_task.TASKS)
+    with tempfile.TemporaryDirectory() as tmp:
+        cron_task.LOG_DIR = os.path.join(tmp, "log")
+        os.makedirs(cron_task.LOG_DIR)
+        cron_task.TASKS_FILE = os.path.join(tmp, "cron_task.json")
+        if tasks_source and os.path.exists(tasks_source):
+            shutil.copyfile(tasks_source, cron_task.TASKS_FILE)
+        cron_task.LOG_TO_CONSOLE = False
+        cron_task.setup_logger()
+        try:
+            yield tmp
+        finally:
+            cron_task.flush_logger(timeout=60)
+            cron_task.stop_logger()
+            cron_task.LOG_DIR, cron_task.TASKS_FILE, cron_task.LOG_TO_CONSOLE, tasks = saved
+            use_tasks(tasks)
+
+
+def timed(func, *args, repeat=3):
+    """Лучшее время выполнения func(*args) из repeat попыток (сек)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def random_cron_expr(rnd):
+    """Случайное cron-выражение из типовых форм"""
+    def field(low, high, names=()):
+        kind = rnd.randrange(7)
+        if kind == 0:
+            return "*"
+        if kind == 1:
+            return f"*/{rnd.randint(1, high - low + 1)}"
+        if kind == 2:
+            a = rnd.randint(low, high - 1)
+            return f"{a}-{rnd.randint(a + 1, high)}"
+        if kind == 3:
+            a = rnd.randint(low, high - 1)
+            return f"{a}-{rnd.randint(a + 1, high)}/{rnd.randint(1, 5)}"
+        if kind == 4:
+            return ",".join(str(v) for v in rnd.sample(range(low, high + 1), rnd.randint(1, 3)))
+        if kind == 5 and names:
+            return rnd.choice(names)
+        return str(rnd.randint(low, high))
+
+    return " ".join([
+        field(0, 59),
+        field(0, 23),
+        field(1, 31),
+        field(1, 12, ("jan", "jun", "dec")),
+        field(0, 7, ("mon", "fri", "sun")),
+    ])
+
+
+def verify_cron(samples=2000, steps=5, seed=1):
+    """Сверка CronSpec.next_after с croniter на случайных выражениях.
+
+    Возвращает (расхождения, отказы croniter). Отказ — croniter не нашёл дату
+    там, где она есть: при объединении дня месяца и дня недели по ИЛИ он падает,
+    если день месяца сам по себе невозможен (например, 31 апреля).
+    """
+    rnd = random.Random(seed)
+    mismatches = []
+    croniter_failures = []
+    for _ in range(samples):
+        expr = random_cron_expr(rnd)
+        spec = cron_task.compile_cron(expr)
+        if not croniter.is_valid(expr):
+            if spec is not None:
+                mismatches.append((expr, "valid", "invalid"))
+            continue
+        base = datetime(2020, 1, 1) + timedelta(minutes=rnd.randrange(60 * 24 * 366 * 8))
+        it = croniter(expr, base)
+        current = base
+        for _ in range(steps):
+            try:
+                actual = spec.next_after(current)
+            except Exception:
+                actual = None
+            try:
+                expected = it.get_next(datetime)
+            except Exception:
+                expected = None
+                if actual is not None and getattr(spec, "day_or", False):
+                    croniter_failures.append((expr, current, actual))
+                    break
+            if expected != actual:
+                mismatches.append((expr, current, expected, actual))
+                break
+            if expected is None:
+                break
+            current = expected
+    return mismatches, croniter_failures
+
+
+def bench_cron(count=50000, unique=500, seed=2):
+    """Пакетный расчёт next_run: count задач с unique различными выражениями"""
+    rnd = random.Random(seed)
+    pool = [random_cron_expr(rnd) for _ in range(unique)]
+    exprs = [rnd.choice(pool) for _ in range(count)]
+    base = datetime(2025, 6, 15, 12, 30)
+
+    cron_task._cron_cache.clear()
+    cold = timed(cron_task.next_fire_batch, exprs, base, repeat=1)
+    warm = timed(cron_task.next_fire_batch, exprs, base)
+
+    def with_croniter():
+        for expr in exprs:
+            try:
+                croniter(expr, base).get_next(datetime)
+            except Exception:
+                pass
+
+    baseline = timed(with_croniter, repeat=1)
+    return {"tasks": count, "unique_exprs": unique,
+            "batch_cold_s": cold, "batch_warm_s": warm, "croniter_s": baseline}
+
+
+def decode_samples(lines=5000):
+    """Строки вывода в UTF-8 и cp1251 (как у консольных утилит Windows)"""
+    text = [f"Строка {i}: обработано файлов {i * 3}, ошибок нет" for i in range(lines)]
+    return {
+        "utf-8": [line.encode("utf-8") for line in text],
+        "cp1251": [line.encode("cp1251") for line in text],
+    }
+
+
+def bench_decode(lines=5000):
+    """Декодирование: detect_and_decode на каждой строке против StreamDecoder на поток"""
+    results = {}
+    for encoding, sample in decode_samples(lines).items():
+        def per_line():
+            for line in sample:
+                cron_task.detect_and_decode(line)
+
+        def per_stream():
+            decoder = cron_task.StreamDecoder()
+            for line in sample:
+                decoder.decode(line)
+
+        old = timed(per_line, repeat=1)
+        new = timed(per_stream)
+        results[encoding] = {"lines": lines, "per_line_s": old, "stream_s": new,
+                             "lines_per_s": lines / new if new else None}
+    return results
+
+
+def bench_logging(lines=20000):
+    """Пропускная способность log_message (строк/с): синхронная запись против фоновой"""
+    message = "│ 📤 [12:00:00] Строка вывода задачи с обычной длиной"
+    with tempfile.TemporaryDirectory() as tmp:
+        # Прежняя схема: setup_logger на каждое сообщение, FileHandler + StreamHandler синхронно
+        legacy = logging.getLogger("benchmark.legacy")
+        legacy.propagate = False
+        legacy.setLevel(logging.INFO)
+        formatter = logging.Formatter(cron_task.LOG_FORMAT)
+        legacy_file = os.path.join(tmp, "legacy.log")
+        devnull = open(os.devnull, "w")
+        handlers = [logging.FileHandler(legacy_file, encoding="utf-8"), logging.StreamHandler(devnull)]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+            legacy.addHandler(handler)
+
+        def sync_log():
+            for _ in range(lines):
+                if cron_task.get_today_log_file() != legacy_file:
+                    pass
+                legacy.info(message)
+
+        sync_s = timed(sync_log, repeat=1)
+        for handler in handlers:
+            legacy.removeHandler(handler)
+            handler.close()
+        devnull.close()
+
+        # Новая схема: очередь + LogWriter (каталог лога и логгер — от isolated_section)
+        cron_task.setup_logger()
+
+        def async_log():
+            for _ in range(lines):
+                cron_task.log_message(message)
+
+        caller_s = timed(async_log, repeat=1)
+        start = time.perf_counter()
+        cron_task.flush_logger(timeout=60)
+        drain_s = time.perf_counter() - start
+
+    return {"lines": lines,
+            "sync_lines_per_s": lines / sync_s,
+            "queued_caller_lines_per_s": lines / caller_s,
+            "queued_end_to_end_lines_per_s": lines / (caller_s + drain_s)}
+
+
+def bench_startup(runs=5):
+    """Холодный импорт cron_task в отдельном процессе (как при старте --headless)"""
+    code = ("import time; t = time.perf_counter(); import cron_task, sys; "
+            "print(time.perf_counter() - t, "
+            "*[m in sys.modules for m in ('tkinter', 'PIL', 'chardet', 'croniter', 'asyncio')])")
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+        total = time.perf_counter() - start
+        best = total if best is None else min(best, total)
+        import_s = float(out[0])
+    loaded = dict(zip(("tkinter", "PIL", "chardet", "croniter", "asyncio"), (v == "True" for v in out[1:])))
+
+    # Запуск программы целиком: как скрипт (компилируется при каждом старте) и через -m (байт-код из __pycache__)
+    here = os.path.dirname(os.path.abspath(__file__))
+    launches = {}
+    for key, launch in (("script_help_s", ["cron_task.py"]), ("module_help_s", ["-m", "cron_task"])):
+        launches[key] = timed(lambda: subprocess.run([sys.executable, *launch, "--help"], capture_output=True,
+                                                     check=True, cwd=here), repeat=runs)
+    return {"process_s": best, "import_s": import_s, **launches, "loaded": loaded}
+
+
+def bench_replay(days=365):
+    """Прогон копии cron_task.json в виртуальном времени: число запусков, порядок, запусков/с"""
+    cron_task.load_tasks()
+    start = datetime(2025, 1, 1)
+    begin = time.perf_counter()
+    fires = cron_task.replay_schedule(start, start + timedelta(days=days))
+    elapsed = time.perf_counter() - begin
+
+    counts = {}
+    for _, tid in fires:
+        counts[tid] = counts.get(tid, 0) + 1
+    return {"days": days, "fires": len(fires), "per_task": counts,
+            "ordered": all(a[0] <= b[0] for a, b in zip(fires, fires[1:])),
+            "elapsed_s": elapsed, "fires_per_s": len(fires) / elapsed if elapsed else None}
+
+
+def bench_warm_runner(runs=20, command="python test_task.py --test text --test_int 12"):
+    """Задержка старта и полное время запуска Python-скрипта: тёплый fork против обычного Popen"""
+    import asyncio
+    import shlex
+
+    args = shlex.split(command)
+    if not cron_task.warm_runner.ensure():
+        return {"skipped": "тёплый запуск недоступен на этой платформе"}
+    loop = cron_task.get_process_loop()
+
+    def measure(stream):
+        spawn, total = [], []
+        for _ in range(runs):
+            begin = time.perf_counter()
+            spawned = []
+            coroutine = stream(args, lambda kind, line: None, lambda: spawned.append(time.perf_counter()))
+            asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+            total.append(time.perf_counter() - begin)
+            spawn.append(spawned[0] - begin)
+        spawn.sort()
+        total.sort()
+        return {"spawn_median_s": spawn[len(spawn) // 2], "total_median_s": total[len(total) // 2]}
+
+    popen = measure(cron_task.stream_process)
+    warm = measure(cron_task.stream_warm_process)
+    cron_task.warm_runner.stop()
+    return {"runs": runs, "command": command, "popen": popen, "warm": warm,
+            "speedup": popen["total_median_s"] / warm["total_median_s"]}
+
+
+def write_synthetic_log(path, day, runs, ids, rnd):
+    """Дневной лог из runs блоков запусков в формате run_script (каждый десятый — с ошибкой)"""
+    moment = day
+    with open(path, "w", encoding="utf-8") as f:
+        for n in range(runs):
+            moment += timedelta(seconds=86400 / runs)
+            prefix = f"{moment:%Y-%m-%d %H:%M:%S},000 - INFO - "
+            clock_str = f"{moment:%H:%M:%S}"
+            outcome = "✅ [{}] Успешно завершена" if rnd.random() < 0.9 else "💥 [{}] Ошибка (код 1)"
+            f.write(f"{prefix}🔄 [#{rnd.choice(ids)}] [{clock_str}] Задача: python job.py\n"
+                    f"{prefix}┌───────────────────────────────\n"
+                    f"{prefix}│ 📤 [{clock_str}] Строка вывода {n}\n"
+                    f"{prefix}│ {outcome.format(clock_str)}\n"
+                    f"{prefix}│ ⏱️ [{clock_str}] Время выполнения: 0.010 сек\n"
+                    f"{prefix}└───────────────────────────────\n")
+
+
+def bench_log_search(days=14, runs_per_day=10000, seed=5):
+    """Индекс логов: первичная индексация, пустое обновление, поиск и чтение блока из gzip-архива"""
+    rnd = random.Random(seed)
+    ids = [f"{n:08x}" for n in range(100)]
+    log_dir, to_console = cron_task.LOG_DIR, cron_task.LOG_TO_CONSOLE
+    with tempfile.TemporaryDirectory() as tmp:
+        cron_task.LOG_DIR, cron_task.LOG_TO_CONSOLE = tmp, False
+        try:
+            first = datetime(2025, 1, 1)
+            for n in range(days):
+                day = first + timedelta(days=n)
+                path = os.path.join(tmp, f"cron_task_{day:%Y-%m-%d}.log")
+                write_synthetic_log(path, day, runs_per_day, ids, rnd)
+                if n < days - 1:  # Все дни, кроме последнего, — в архиве
+                    cron_task.archive_log_file(path, "gzip")
+
+            index = cron_task.LogIndex()
+            begin = time.perf_counter()
+            indexed = index.update()
+            build_s = time.perf_counter() - begin
+            update_s = timed(index.update)
+
+            since = (first + timedelta(days=days // 2)).timestamp()
+            until = since + 2 * 86400
+
+            def query():
+                return index.search(ids[7], since, until, failures_only=True)
+
+            search_s = timed(query, repeat=20)
+            found = query()
+            read_s = timed(lambda: cron_task.read_run_block(*found[-1][:2]), repeat=20) if found else None
+            index.close()
+        finally:
+            cron_task.LOG_DIR, cron_task.LOG_TO_CONSOLE = log_dir, to_console
+
+    return {"days": days, "runs": indexed, "build_s": build_s, "runs_per_s": indexed / build_s,
+            "noop_update_s": update_s, "search_s": search_s, "found": len(found), "read_block_s": read_s}
+
+
+def synthetic_tasks(count, seed=4):
+    """Набор из count задач со смесью типовых форм выражений и постоянными ID"""
+    rnd = random.Random(seed)
+    pool = [random_cron_expr(rnd) for _ in range(min(count, 2000))]
+    aliases = ("@hourly", "@daily", "@weekly", "@monthly")
+    tasks = []
+    for i in range(count):
+        shape = rnd.random()
+        if shape < 0.6:
+            expr = rnd.choice(pool)
+        elif shape < 0.7:
+            expr = rnd.choice(aliases)
+        elif shape < 0.85:
+            expr = f"*/{rnd.choice((1, 2, 5, 10, 15, 30))} * * * *"
+        else:
+            expr = f"{rnd.randrange(60)} {rnd.randrange(24)} * * *"
+        tasks.append((expr, f"python job_{i}.py", {"id": f"{i:08x}"}))
+    return tasks
+
+
+def use_tasks(tasks):
+    """Подменить список задач cron_task"""
+    cron_task.TASKS[:] = tasks
+    cron_task.reindex_tasks()
+
+
+def bench_scheduler(count, seed=4):
+    """Стоимость построения расписания, холостого такта, перепланирования и срабатываний"""
+    tasks = synthetic_tasks(count, seed)
+    use_tasks(tasks)
+    start = datetime(2025, 6, 15, 12, 30, 30)
+    saved_clock = cron_task.clock
+    cron_task.clock = cron_task.VirtualClock(start)
+    try:
+        cron_task._cron_cache.clear()
+        setup_cold = timed(cron_task.setup_schedules, repeat=1)
+        setup_warm = timed(cron_task.setup_schedules)
+
+        ticks = 1000
+
+        def idle_ticks():
+            for _ in range(ticks):
+                cron_task.check_schedules()
+
+        tick = timed(idle_ticks) / ticks
+
+        rnd = random.Random(seed)
+        changed = [(f"{rnd.randrange(60)} {rnd.randrange(24)} * * *", cmd, options)
+                   for _, cmd, options in rnd.sample(tasks, min(1000, count))]
+
+        def reschedule():
+            for task in changed:
+                cron_task.schedule_task(task)
+
+        reschedule_s = timed(reschedule, repeat=1) / len(changed)
+    finally:
+        cron_task.clock = saved_clock
+
+    minutes = 10
+    fires_count = 0
+
+    def count_fire(moment, tid):
+        nonlocal fires_count
+        fires_count += 1
+
+    begin = time.perf_counter()
+    cron_task.replay_schedule(start, start + timedelta(minutes=minutes), on_fire=count_fire)
+    replay_s = time.perf_counter() - begin
+    return {"tasks": count, "setup_cold_s": setup_cold, "setup_warm_s": setup_warm,
+            "idle_tick_s": tick, "reschedule_per_task_s": reschedule_s,
+            "replay_minutes": minutes, "replay_fires": fires_count, "replay_s": replay_s,
+            "fires_per_s": fires_count / replay_s if replay_s else None}
+
+
+def start_virtual_display():
+    """Поднять Xvfb, если дисплея нет, а Xvfb установлен; возвращает процесс или None"""
+    if os.environ.get("DISPLAY") or not shutil.which("Xvfb"):
+        return None
+    proc = subprocess.Popen(["Xvfb", ":99", "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ["DISPLAY"] = ":99"
+    time.sleep(1)
+    return proc
+
+
+def bench_gui(count, log_lines=200, repeat=20):
+    """Стоимость update_gui в скрытом окне Tk: первая отрисовка, холостой вызов, новые строки лога, смена расписания"""
+    try:
+        cron_task.load_gui_modules()
+        root = cron_task.tk.Tk()
+    except Exception as e:
+        return {"tasks": count, "skipped": f"нет дисплея для Tk: {e}"}
+
+    tk = cron_task.tk
+    root.withdraw()
+    try:
+        cron_task.root = root
+        frame = tk.Frame(root)
+        frame.pack()
+        cron_task.create_task_table(frame)
+        cron_task.log_text = cron_task.scrolledtext.ScrolledText(root, state="disabled")
+        cron_task.mark_task_row()
+        cron_task.task_rows.clear()
+
+        use_tasks(synthetic_tasks(count))
+        cron_task.setup_schedules()
+
+        def update():
+            cron_task.update_gui()
+            root.update_idletasks()
+
+        first = timed(update, repeat=1)
+        idle = timed(update, repeat=repeat)
+
+        def with_log():
+            for i in range(log_lines):
+                cron_task.log_message(f"│ 📤 [12:00:00] Строка вывода {i}")
+            update()
+
+        log_s = timed(with_log, repeat=repeat)
+
+        tasks = cron_task.TASKS
+
+        def with_reschedule():
+            cron_expr, full_command, options = tasks[0]
+            cron_task.schedule_task((cron_expr + " ", full_command, options))
+            update()
+
+        reschedule_s = timed(with_reschedule, repeat=repeat)
+    finally:
+        cron_task.root = cron_task.log_text = cron_task.task_tree = None
+        cron_task.task_rows.clear()
+        root.destroy()
+
+    return {"tasks": count, "first_s": first, "idle_s": idle,
+            f"log_{log_lines}_lines_s": log_s, "reschedule_one_s": reschedule_s}
+
+
+def run_metadata():
+    """Версии и окружение прогона — для сравнения результатов между версиями"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"timestamp": datetime.now().isoformat(timespec="seconds"), "commit": commit,
+            "python": platform.python_version(), "platform": platform.platform()}
+
+
+def flatten(results, prefix=""):
+    """Плоский словарь {путь: число} из вложенных результатов"""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, path + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(old, new, threshold=0.2):
+    """Замеры времени (*_s), ставшие медленнее более чем на threshold: [(путь, было, стало), ...]"""
+    old_flat, new_flat = flatten(old), flatten(new)
+    slower = []
+    for path, value in new_flat.items():
+        before = old_flat.get(path)
+        if path.endswith("_s") and before and value > before * (1 + threshold):
+            slower.append((path, before, value))
+    return slower
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры производительности cron_task.py")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="размеры наборов задач через запятую")
+    parser.add_argument("--json", metavar="FILE", help="записать результаты в JSON (- — в stdout)")
+    parser.add_argument("--compare", metavar="FILE", help="сравнить с результатами прошлого прогона")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимое замедление при сравнении (доля)")
+    parser.add_argument("--no-gui", action="store_true", help="не замерять update_gui")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    report = print if args.json != "-" else (lambda *a: print(*a, file=sys.stderr))
+
+    results = {"meta": run_metadata()}
+    mismatches, croniter_failures = verify_cron()
+    results["verify"] = {"mismatches": len(mismatches), "croniter_failures": len(croniter_failures)}
+    report(f"Сверка с croniter: расхождений {len(mismatches)}, отказов croniter {len(croniter_failures)}")
+    for item in mismatches[:10]:
+        report("  ", item)
+
+    sections = [
+        ("cron_batch", "Пакетный расчёт next_run", bench_cron),
+        ("decode", "Декодирование вывода", bench_decode),
+        ("logging", "Логирование", bench_logging),
+        ("startup", "Старт", bench_startup),
+        ("replay", "Год расписания в виртуальном времени", bench_replay),
+        ("warm_runner", "Тёплый запуск Python", bench_warm_runner),
+        ("log_search", "Поиск по логам", bench_log_search),
+    ]
+    for key, title, func in sections:
+        with isolated_section():
+            results[key] = func()
+        report(f"{title}:", results[key])
+
+    results["scheduler"] = {}
+    for size in sizes:
+        with isolated_section():
+            results["scheduler"][str(size)] = bench_scheduler(size)
+        report(f"Планировщик, {size} задач:", results["scheduler"][str(size)])
+
+    if not args.no_gui:
+        display = start_virtual_display()
+        try:
+            results["gui"] = {}
+            for size in sizes:
+                with isolated_section():
+                    results["gui"][str(size)] = bench_gui(size)
+                report(f"update_gui, {size} задач:", results["gui"][str(size)])
+        finally:
+            if display:
+                display.terminate()
+
+    if args.json == "-":
+        json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            slower = compare(json.load(f), results, args.threshold)
+        for path, before, value in slower:
+            report(f"⚠️ Замедление {path}: {before:.6f} → {value:.6f} с ({value / before - 1:+.0%})")
+        if slower:
+            return 1
+    if mismatches:
+        report(f"⚠️ Движок cron расходится с croniter: {len(mismatches)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
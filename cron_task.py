@@ -4,28 +4,89 @@
 import subprocess
 import time
 import logging
+import queue
+import sys
+import atexit
 import threading
 import json
 import os
-from datetime import datetime
-from croniter import croniter
-import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox, filedialog
+import heapq
+import itertools
+import calendar
+import re
+from collections import deque
+from functools import lru_cache
+from datetime import datetime, timedelta
 import shlex
-import chardet  # pip install chardet
-from PIL import Image, ImageTk  # pip install pillow
+import select
+import struct
+import zlib
+
+# --- Тяжёлые зависимости импортируются лениво ---
+# tkinter и Pillow нужны только GUI (см. load_gui_modules), chardet — только
+# для не-UTF-8 вывода, croniter — только для редкого синтаксиса cron, asyncio —
+# при первом запуске задачи. Так режим --headless стартует без них.
+tk = ttk = scrolledtext = messagebox = filedialog = None
+Image = ImageTk = None
 
 # --- Путь к файлу задач ---
 TASKS_FILE = "cron_task.json"
+task_db = None  # SqliteTaskStore, если задачи хранятся в SQLite (--db)
+tasks_file_signature = None  # (mtime_ns, size, inode) файла задач после последнего чтения/записи
+TASKS_POLL_INTERVAL = 2  # Сек между проверками файла задач, если inotify недоступен
+TASKS_RELOAD_DELAY = 0.3  # Пауза после события, чтобы дождаться окончания записи
 
-# --- Список задач: (cron_expr, full_command) ---
+# --- Список задач: (cron_expr, full_command, options), options["id"] — постоянный ID ---
 TASKS = []
+tasks_by_id = {}  # id -> задача из TASKS
 
 # --- Глобальные переменные ---
-log_messages = []
-scheduled_jobs = []  # [{cron_iter, next_run, task, expr}, ...]
+LOG_BUFFER_SIZE = 5000  # Сколько последних сообщений хранится в памяти
+LOG_VIEW_LINES = 500  # Сколько строк показывается в окне лога
+log_messages = deque(maxlen=LOG_BUFFER_SIZE)  # [(seq, msg), ...]
+log_seq = 0  # Номер последнего сообщения (растёт монотонно)
+log_buffer_lock = threading.Lock()
+scheduled_jobs = {}  # id -> {id, spec, next_run, task, expr, options}
 stop_event = threading.Event()
 
+# --- Очередь расписания: куча по next_run ---
+schedule_heap = []  # [(next_run, seq, job), ...]; записи удалённых заданий вычищаются лениво
+schedule_stale = 0  # Число устаревших записей в куче
+schedule_seq = itertools.count()  # Разрыв равенства next_run без сравнения dict
+schedule_cond = threading.Condition()  # Пробуждение планировщика при изменении задач
+SCHEDULER_MAX_SLEEP = 60  # Макс. сон (сек) — страховка от перевода системных часов
+GUI_REFRESH_MS = 1000
+
+# --- Пропущенные запуски (сон, зависание, перевод часов) ---
+MISFIRE_COALESCE = "coalesce"  # Один запуск вместо всех пропущенных
+MISFIRE_ALL = "all"  # Выполнить каждый пропущенный запуск
+MISFIRE_SKIP = "skip"  # Не выполнять пропущенные, ждать следующего срока
+MISFIRE_POLICIES = (MISFIRE_COALESCE, MISFIRE_ALL, MISFIRE_SKIP)
+DEFAULT_MISFIRE_POLICY = MISFIRE_COALESCE
+MISFIRE_GRACE = float(os.environ.get("CRON_TASK_MISFIRE_GRACE", "60"))  # Опоздание (сек), которое ещё не пропуск
+MISFIRE_MAX_FIRES = 100  # Предел запусков при политике all
+CLOCK_JUMP_THRESHOLD = 30  # Расхождение (сек) системных и монотонных часов, считающееся скачком
+clock_reference = None  # (time.time(), time.monotonic()) на прошлом такте планировщика
+
+# --- Несколько экземпляров: аренда ведущего и шарды ---
+LEASE_POLL_INTERVAL = 2  # Сек между попытками резервного экземпляра стать ведущим
+SHARD_RESTART_DELAY = 5  # Сек до перезапуска упавшего процесса-шарда
+lease = None  # LeaderLease; запуски выполняет только экземпляр, который её держит
+lease_standby_since = None  # Когда резервный экземпляр последний раз видел живого ведущего
+shard = None  # (номер, всего), если процесс планирует только свою долю задач
+shard_parent = None  # PID управляющего процесса шарда; сменился — управляющий умер
+
+# --- Пул выполнения ---
+POOL_MAX_WORKERS = int(os.environ.get("CRON_TASK_MAX_WORKERS", "8"))  # Глобальный предел одновременных запусков
+OVERLAP_ALLOW = "allow"  # Запускать параллельно с предыдущим запуском
+OVERLAP_SKIP = "skip"  # Пропустить, если предыдущий запуск ещё идёт
+OVERLAP_QUEUE_ONE = "queue_one"  # Отложить один запуск до завершения текущего
+OVERLAP_POLICIES = (OVERLAP_ALLOW, OVERLAP_SKIP, OVERLAP_QUEUE_ONE)
+DEFAULT_OVERLAP_POLICY = OVERLAP_ALLOW
+SPAWN_RATE = float(os.environ.get("CRON_TASK_SPAWN_RATE", "0"))  # Запусков в секунду (0 — без ограничения)
+SPAWN_BURST = int(os.environ.get("CRON_TASK_SPAWN_BURST", "10"))  # Сколько запусков можно сделать разом
+DEFAULT_JITTER = float(os.environ.get("CRON_TASK_JITTER", "0"))  # Окно разброса старта задач (сек)
+
 # --- GUI переменные ---
 root = None
 log_text = None
@@ -37,110 +98,1109 @@ weekday_var = None
 command_entry = None
 tasks_frame = None
 sort_reset_btn = None
+status_label = None
 
 # --- Состояние сортировки ---
 sort_key = None  # 'cron', 'command', 'next_run'
 sort_reverse = False
-original_tasks_order = []  # Актуальный сохранённый порядок
 
-# --- Хранение виджетов ---
-task_widgets = []  # [cron_lbl, cmd_lbl, next_lbl, btn_frame]
+# --- Таблица задач ---
+task_tree = None  # ttk.Treeview: строки — элементы дерева, а не отдельные виджеты
+task_rows = {}  # id задачи (= iid строки) -> (values, tag), показанные в таблице
+task_row_data = {}  # id задачи -> данные строки (task_row), посчитанные при последнем обновлении
+task_order = []  # Порядок iid строк, показанный в таблице
+TASK_COLUMNS = {"cron": "Cron", "command": "Команда", "next_run": "Ближайшее выполнение",
+                "duration": "Длительность", "success": "Успешно"}
+changed_task_ids = None  # ID задач, чьи строки надо пересчитать; None — пересчитать всю таблицу
+changed_task_lock = threading.Lock()
 
 # --- Для динамического логирования ---
 LOG_DIR = "log"
+LOG_FILE_SUFFIX = ""  # У процессов-шардов свой файл лога: cron_task_<дата>.shard<N>.log
 os.makedirs(LOG_DIR, exist_ok=True)  # Создаём папку log
 current_log_file = None
 logger = None
+log_writer = None
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_BATCH_SIZE = 1000  # Макс. сообщений, записываемых за один сброс на диск
+LOG_TO_CONSOLE = True  # Дублировать лог в stderr
+log_setup_lock = threading.Lock()
 
 # --- Для синхронизации лога ---
 log_lock = threading.Lock()
 
-# --- Кэширование для оптимизации ---
-last_log_hash = None
+# --- Номер последнего сообщения, выведенного в окно лога ---
+log_shown_seq = 0
 
 
 def get_today_log_file():
     """Вернуть путь к файлу лога на сегодня"""
     today = datetime.now().strftime('%Y-%m-%d')
-    return os.path.join(LOG_DIR, f"cron_task_{today}.log")
+    return os.path.join(LOG_DIR, f"cron_task_{today}{LOG_FILE_SUFFIX}.log")
+
+
+class LogWriter(threading.Thread):
+    """Фоновая запись лога пачками с переключением файла ровно в полночь
+
+    Сообщения приходят через очередь от QueueHandler, поэтому потоки задач
+    не ждут диска. Файл выбирается по времени создания записи, а не по
+    времени записи на диск.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(daemon=True, name="log-writer")
+        self.queue = log_queue
+        self.formatter = logging.Formatter(LOG_FORMAT)
+        self._file = None
+        self._day_end = 0.0  # Метка времени полуночи, после которой нужен новый файл
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < LOG_BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not self._write(batch):
+                break
+
+    def _open_for(self, created):
+        """Открыть файл дня, к которому относится запись с меткой времени created"""
+        global current_log_file
+        if self._file:
+            self._file.close()
+        day = datetime.fromtimestamp(created).replace(hour=0, minute=0, second=0, microsecond=0)
+        self._day_end = (day + timedelta(days=1)).timestamp()
+        current_log_file = os.path.join(LOG_DIR, f"cron_task_{day:%Y-%m-%d}{LOG_FILE_SUFFIX}.log")
+        os.makedirs(LOG_DIR, exist_ok=True)
+        self._file = open(current_log_file, "a", encoding="utf-8")
+
+    def _write(self, batch):
+        """Записать пачку; False — получен сигнал остановки"""
+        running = True
+        lines = []
+        markers = []
+        for record in batch:
+            if record is None:
+                running = False
+                continue
+            if isinstance(record, threading.Event):
+                markers.append(record)
+                continue
+            if record.created >= self._day_end:
+                self._flush(lines)
+                lines = []
+                self._open_for(record.created)
+            lines.append(self.formatter.format(record) + "\n")
+        self._flush(lines)
+        for marker in markers:
+            marker.set()
+        if not running and self._file:
+            self._file.close()
+            self._file = None
+        return running
+
+    def _flush(self, lines):
+        if not lines:
+            return
+        text = "".join(lines)
+        try:
+            self._file.write(text)
+            self._file.flush()
+        except Exception as e:
+            if sys.stderr:
+                sys.stderr.write(f"Ошибка записи лога: {e}\n")
+        if LOG_TO_CONSOLE and sys.stderr:
+            try:
+                sys.stderr.write(text)
+            except Exception:
+                pass
 
 
 def setup_logger():
-    """Настроить логгер с учётом текущей даты"""
-    global logger, current_log_file
+    """Настроить логгер: QueueHandler на корневом логгере и фоновый LogWriter"""
+    with log_setup_lock:
+        if log_writer is not None:
+            return
+        _start_log_writer()
 
-    new_log_file = get_today_log_file()
 
-    if new_log_file != current_log_file:
-        current_log_file = new_log_file
+def _start_log_writer():
+    global logger, log_writer
+    import logging.handlers
 
-        if logger and logger.hasHandlers():
-            for handler in logger.handlers[:]:
-                logger.removeHandler(handler)
-                handler.close()
+    log_queue = queue.SimpleQueue()
+    log_writer = LogWriter(log_queue)
+    log_writer.start()
 
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(current_log_file, encoding='utf-8', mode='a'),
-                logging.StreamHandler()
-            ]
-        )
-        logger = logging.getLogger()
+    logger = logging.getLogger()
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+        handler.close()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    atexit.register(stop_logger)
+
+
+def flush_logger(timeout=5):
+    """Дождаться записи на диск всех сообщений, отправленных до вызова"""
+    if log_writer is None or not log_writer.is_alive():
+        return
+    marker = threading.Event()
+    log_writer.queue.put(marker)
+    marker.wait(timeout)
+
+
+def stop_logger(timeout=5):
+    """Дописать очередь и остановить фоновую запись лога (следующий log_message запустит её снова)"""
+    global log_writer
+    if log_writer is None or not log_writer.is_alive():
+        return
+    log_writer.queue.put(None)
+    log_writer.join(timeout)
+    log_writer = None
 
 
 def log_message(msg):
     """Записать сообщение в лог (файл и GUI)"""
-    setup_logger()
+    if log_writer is None:
+        setup_logger()
     logging.info(msg)
-    log_messages.append(msg)
+    global log_seq
+    with log_buffer_lock:
+        log_seq += 1
+        log_messages.append((log_seq, msg))
+
+
+def get_new_log_messages(after_seq):
+    """Сообщения с номером больше after_seq: (новые сообщения, номер последнего, были ли потеряны)"""
+    with log_buffer_lock:
+        last_seq = log_seq
+        count = min(last_seq - after_seq, len(log_messages))
+        new = [msg for _, msg in itertools.islice(reversed(log_messages), count)]
+        lost = last_seq - after_seq > count
+    new.reverse()
+    return new, last_seq, lost
+
+
+# --- Архивация и срок хранения логов ---
+ARCHIVE_FORMAT = os.environ.get("CRON_TASK_ARCHIVE", "gzip")  # gzip, zstd или off
+LOG_RETENTION_DAYS = int(os.environ.get("CRON_TASK_LOG_RETENTION_DAYS", "0"))  # 0 — хранить всегда
+LOG_MAX_TOTAL_MB = int(os.environ.get("CRON_TASK_LOG_MAX_MB", "0"))  # 0 — без предела объёма
+ARCHIVE_INTERVAL = 3600  # Сек между проходами архиватора
+ARCHIVE_MIN_AGE = 600  # Файл, менявшийся за последние N сек, ещё может дописываться (другим процессом)
+ARCHIVE_MEMBER_SIZE = 1024 * 1024  # Байт исходного лога в одном gzip-члене / zstd-кадре
+ARCHIVE_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+DAILY_LOG_RE = re.compile(r"^cron_task_(\d{4}-\d{2}-\d{2})(\.shard\d+)?\.log(\.gz|\.zst)?$")
+SPILL_LOG_RE = re.compile(r"^run_(\d{4}-\d{2}-\d{2})_.*\.log$")
+
+
+def _archive_compressor(fmt):
+    """Функция сжатия одного независимого блока: gzip-член или zstd-кадр"""
+    if fmt == "zstd":
+        import zstandard  # pip install zstandard
+
+        compressor = zstandard.ZstdCompressor(level=3)
+        return compressor.compress
+    import gzip
+
+    return lambda data: gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def archive_log_file(path, fmt="gzip"):
+    """Сжать файл лога потоково, блоками по ARCHIVE_MEMBER_SIZE; вернуть путь архива
+
+    Каждый блок сжимается отдельно (gzip-член или zstd-кадр), поэтому архив
+    читается обычными gunzip/zstd, а с таблицей блоков (<архив>.members)
+    можно начать чтение с любого места, не распаковывая файл целиком.
+    """
+    import tempfile
+
+    compress = _archive_compressor(fmt)
+    target = path + ARCHIVE_SUFFIXES[fmt]
+    members = []  # [(смещение в исходном файле, смещение в архиве), ...]
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(target) + ".", suffix=".part",
+                                    dir=os.path.dirname(path) or ".")
+    try:
+        plain_offset = 0
+        with open(path, "rb") as src, open(fd, "wb") as dst:
+            while True:
+                data = src.read(ARCHIVE_MEMBER_SIZE)
+                if not data:
+                    break
+                members.append((plain_offset, dst.tell()))
+                dst.write(compress(data))
+                plain_offset += len(data)
+            dst.flush()
+            os.fsync(dst.fileno())
+        write_json_atomic(target + ".members", {"format": fmt, "size": plain_offset, "members": members})
+        copy_file_mode(tmp_path, path)  # Права архива — как у исходного лога
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    os.remove(path)
+    return target
+
+
+def _log_files():
+    """Файлы в LOG_DIR, к которым применяется хранение: [(путь, дата, размер), ...]"""
+    files = []
+    try:
+        names = os.listdir(LOG_DIR)
+    except OSError:
+        return files
+    for name in names:
+        m = DAILY_LOG_RE.match(name) or SPILL_LOG_RE.match(name)
+        if not m:
+            continue
+        path = os.path.join(LOG_DIR, name)
+        try:
+            files.append((path, m.group(1), os.path.getsize(path)))
+        except OSError:
+            pass
+    return files
+
+
+def _remove_log(path):
+    for victim in (path, path + ".members"):
+        try:
+            os.remove(victim)
+        except FileNotFoundError:
+            pass
+
+
+def archive_logs(today=None):
+    """Один проход архиватора: сжать прошедшие дни и удалить логи сверх срока и объёма"""
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    fmt = ARCHIVE_FORMAT
+    if fmt == "zstd":
+        import importlib.util
+
+        if importlib.util.find_spec("zstandard") is None:
+            log_message("⚠️ Модуль zstandard не установлен, логи сжимаются gzip")
+            fmt = "gzip"
+
+    if fmt in ARCHIVE_SUFFIXES:
+        for path, day, _ in _log_files():
+            name = os.path.basename(path)
+            if day >= today or not name.endswith(".log") or not name.startswith("cron_task_"):
+                continue
+            try:
+                recently_written = time.time() - os.path.getmtime(path) < ARCHIVE_MIN_AGE
+            except OSError:
+                continue
+            if path == current_log_file or recently_written:
+                continue  # Запись за прошлый день ещё может дописываться после полуночи
+            try:
+                target = archive_log_file(path, fmt)
+                log_message(f"🗜️ Лог сжат: {target}")
+            except Exception as e:
+                log_message(f"⚠️ Не удалось сжать {path}: {e}")
+
+    files = sorted(_log_files(), key=lambda item: (item[1], item[0]))
+    if LOG_RETENTION_DAYS:
+        border = (datetime.strptime(today, "%Y-%m-%d") - timedelta(days=LOG_RETENTION_DAYS)).strftime("%Y-%m-%d")
+        for path, day, _ in [item for item in files if item[1] < border]:
+            _remove_log(path)
+            log_message(f"🧹 Удалён лог старше {LOG_RETENTION_DAYS} дн.: {path}")
+        files = [item for item in files if item[1] >= border]
+    if LOG_MAX_TOTAL_MB:
+        total = sum(size for _, _, size in files)
+        limit = LOG_MAX_TOTAL_MB * 1024 * 1024
+        for path, day, size in files:
+            if total <= limit or day >= today:
+                break
+            _remove_log(path)
+            total -= size
+            log_message(f"🧹 Удалён лог сверх {LOG_MAX_TOTAL_MB} МБ: {path}")
+
+
+def log_archiver_worker():
+    """Фоновый поток архиватора: проход при старте и раз в ARCHIVE_INTERVAL
+
+    После прохода дополняется индекс запусков, чтобы поиск не разбирал логи сам.
+    """
+    while not stop_event.is_set():
+        if lease is not None and not lease.held:  # Архивирует только ведущий экземпляр
+            stop_event.wait(LEASE_POLL_INTERVAL)
+            continue
+        try:
+            archive_logs()
+        except Exception as e:
+            log_message(f"⚠️ Ошибка архиватора логов: {e}")
+        try:
+            index = LogIndex()
+            try:
+                index.update()
+            finally:
+                index.close()
+        except Exception as e:
+            log_message(f"⚠️ Ошибка индексации логов: {e}")
+        stop_event.wait(ARCHIVE_INTERVAL)
+
+
+def start_log_archiver():
+    """Запустить архиватор логов в фоновом потоке (шарды не архивируют — это делает управляющий)"""
+    if shard is not None or (ARCHIVE_FORMAT not in ARCHIVE_SUFFIXES and not LOG_RETENTION_DAYS
+                             and not LOG_MAX_TOTAL_MB):
+        return None
+    thread = threading.Thread(target=log_archiver_worker, daemon=True, name="log-archiver")
+    thread.start()
+    return thread
+
+
+# --- Индекс запусков в логах ---
+LOG_INDEX_FILE = "log_index.db"  # В LOG_DIR
+RUN_START_MARK = "🔄 [#".encode("utf-8")
+RUN_HEADER_RE = re.compile(r"🔄 \[#([^\]]*)\] ?\[(\d\d):(\d\d):(\d\d)\]".encode("utf-8"))
+RUN_END_MARK = "└".encode("utf-8")
+RUN_OUTCOMES = (  # Начало сообщения -> исход запуска
+    ("│ ✅ [".encode("utf-8"), "ok"),
+    ("│ 💥 [".encode("utf-8"), "error"),
+    ("│ ⏰ [".encode("utf-8"), "timeout"),
+    ("│ 🔥 [".encode("utf-8"), "cpu_limit"),
+    ("│ 💀 [".encode("utf-8"), "exception"),
+    ("❌ ".encode("utf-8"), "invalid"),
+)
+EXIT_CODE_RE = re.compile(rb"\(\S+ (-?\d+)\)")
+LOG_MESSAGE_SEP = b" - INFO - "
+SEARCH_BLOCK_MAX_LINES = 200  # Сколько строк блока показывать (вывод больше — в файле запуска)
+
+
+def open_log_at(name, offset=0):
+    """Открыть файл лога (обычный или архив) для чтения с offset байт исходного текста
+
+    Для архива с таблицей блоков распаковка начинается с ближайшего блока,
+    а не с начала файла. None — файла нет ни в каком виде.
+    """
+    import bisect
+
+    path = os.path.join(LOG_DIR, name)
+    if os.path.exists(path):
+        f = open(path, "rb")
+        f.seek(offset)
+        return f
+
+    for fmt, suffix in ARCHIVE_SUFFIXES.items():
+        archive = path + suffix
+        if not os.path.exists(archive):
+            continue
+        plain_start, packed_start = 0, 0
+        try:
+            with open(archive + ".members", encoding="utf-8") as f:
+                members = json.load(f)["members"]
+            i = bisect.bisect_right([plain for plain, _ in members], offset) - 1
+            if i >= 0:
+                plain_start, packed_start = members[i]
+        except (OSError, ValueError, KeyError):
+            pass  # Без таблицы блоков — распаковка с начала
+        raw = open(archive, "rb")
+        raw.seek(packed_start)
+        if fmt == "zstd":
+            import io
+            import zstandard
+
+            stream = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True))
+        else:
+            import gzip
+
+            stream = gzip.GzipFile(fileobj=raw, mode="rb")
+        skip = offset - plain_start
+        while skip > 0:
+            chunk = stream.read(min(skip, PIPE_CHUNK_SIZE))
+            if not chunk:
+                break
+            skip -= len(chunk)
+        return stream
+    return None
+
+
+def _log_names():
+    """Имена файлов лога без суффикса сжатия: {имя: архив ли}"""
+    names = {}
+    try:
+        entries = os.listdir(LOG_DIR)
+    except OSError:
+        return names
+    for entry in entries:
+        m = DAILY_LOG_RE.match(entry)
+        if m:
+            name = entry[:len(entry) - len(m.group(3) or "")]
+            names[name] = names.get(name, True) and bool(m.group(3))
+    return names
+
+
+def _parse_run_start(line, header):
+    """Время начала запуска (unix-время) или None
+
+    Блок запуска пишется в лог целиком после завершения, поэтому время записи
+    строки — это конец запуска. Начало берётся из [ЧЧ:ММ:СС] заголовка, а дата —
+    из времени записи; если начало позже записи, запуск начался накануне.
+    """
+    try:
+        written = datetime(int(line[0:4]), int(line[5:7]), int(line[8:10]), int(line[11:13]), int(line[14:16]),
+                           int(line[17:19]), int(line[20:23]) * 1000)
+    except (ValueError, IndexError):
+        return None
+    if header is None:
+        return written.timestamp()
+    started = written.replace(hour=int(header.group(2)), minute=int(header.group(3)),
+                              second=int(header.group(4)), microsecond=0)
+    if started > written:
+        started -= timedelta(days=1)
+    return started.timestamp()
+
+
+class LogIndex:
+    """Индекс блоков запусков в логах (SQLite): ID задачи, время, исход, смещение блока
+
+    Смещения хранятся в байтах исходного текста, поэтому индекс остаётся
+    верным и после сжатия файла архиватором. Обновляется инкрементально:
+    для каждого файла запоминается, до какого места он разобран.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            name TEXT PRIMARY KEY,
+            indexed_to INTEGER NOT NULL,
+            complete INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY,
+            file TEXT NOT NULL,
+            offset INTEGER NOT NULL,
+            started REAL,
+            task_id TEXT NOT NULL,
+            outcome TEXT NOT NULL,
+            exit_code INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS runs_task_started ON runs (task_id, started);
+        CREATE INDEX IF NOT EXISTS runs_started ON runs (started);
+    """
+    VERSION = 2  # Версия разбора; индекс старой версии строится заново (1 — время конца вместо начала)
+
+    def __init__(self, path=None):
+        import sqlite3
+
+        self.path = path or os.path.join(LOG_DIR, LOG_INDEX_FILE)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != self.VERSION:
+            self._conn.executescript("DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS runs;")
+            self._conn.execute(f"PRAGMA user_version = {self.VERSION}")
+        self._conn.executescript(self.SCHEMA)
+
+    def update(self):
+        """Дочитать новые записи во всех файлах лога; возвращает число добавленных запусков"""
+        added = 0
+        with self._lock:
+            known = dict((name, (indexed_to, complete)) for name, indexed_to, complete
+                         in self._conn.execute("SELECT name, indexed_to, complete FROM files"))
+            names = _log_names()
+            for name, archived in sorted(names.items()):
+                indexed_to, complete = known.get(name, (0, 0))
+                if complete:
+                    continue
+                added += self._index_file(name, indexed_to, archived)
+            gone = [name for name in known if name not in names]
+            if gone:
+                self._conn.execute("BEGIN IMMEDIATE")
+                for name in gone:  # Удалены по сроку хранения
+                    self._conn.execute("DELETE FROM runs WHERE file = ?", (name,))
+                    self._conn.execute("DELETE FROM files WHERE name = ?", (name,))
+                self._conn.execute("COMMIT")
+        return added
+
+    def _index_file(self, name, start, archived):
+        stream = open_log_at(name, start)
+        if stream is None:
+            return 0
+        rows = []
+        offset = start
+        block = None  # [смещение, время, ID задачи, исход, код]
+        with stream:
+            for line in stream:
+                line_offset = offset
+                offset += len(line)
+                if not line.endswith(b"\n"):
+                    offset = line_offset  # Строка ещё дописывается
+                    break
+                _, sep, message = line.partition(LOG_MESSAGE_SEP)
+                if not sep:
+                    continue
+                if message.startswith(RUN_START_MARK):
+                    header = RUN_HEADER_RE.match(message)
+                    tid = message[len(RUN_START_MARK):].split(b"]", 1)[0].decode("utf-8", "replace")
+                    block = [line_offset, _parse_run_start(line, header), tid, "unknown", None]
+                elif block is None:
+                    continue
+                elif message.startswith(RUN_END_MARK):
+                    rows.append((name, *block))
+                    block = None
+                else:
+                    for mark, outcome in RUN_OUTCOMES:
+                        if message.startswith(mark):
+                            block[3] = outcome
+                            m = EXIT_CODE_RE.search(message)
+                            if m and outcome != "ok":
+                                block[4] = int(m.group(1))
+                            break
+        # Незавершённый блок дочитаем в следующий раз с его начала
+        resume = block[0] if block is not None else offset
+
+        self._conn.execute("BEGIN IMMEDIATE")
+        row = self._conn.execute("SELECT indexed_to FROM files WHERE name = ?", (name,)).fetchone()
+        if (row[0] if row else 0) != start:  # Этот участок уже разобрал другой процесс
+            self._conn.execute("ROLLBACK")
+            return 0
+        self._conn.executemany(
+            "INSERT INTO runs (file, offset, started, task_id, outcome, exit_code) VALUES (?, ?, ?, ?, ?, ?)", rows)
+        self._conn.execute("INSERT OR REPLACE INTO files (name, indexed_to, complete) VALUES (?, ?, ?)",
+                           (name, resume, int(archived)))
+        self._conn.execute("COMMIT")
+        return len(rows)
+
+    def search(self, tid=None, since=None, until=None, failures_only=False, limit=1000):
+        """Последние limit запусков по фильтру: [(файл, смещение, время, ID задачи, исход, код), ...] по времени"""
+        query = "SELECT file, offset, started, task_id, outcome, exit_code FROM runs WHERE 1"
+        params = []
+        if tid:
+            query += " AND task_id = ?"
+            params.append(tid)
+        if since is not None:
+            query += " AND started >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND started < ?"
+            params.append(until)
+        if failures_only:
+            query += " AND outcome != 'ok'"
+        query += " ORDER BY started DESC, id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        rows.reverse()
+        return rows
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def read_run_block(name, offset, max_lines=SEARCH_BLOCK_MAX_LINES):
+    """Строки блока запуска из лога (или архива), начиная со смещения offset"""
+    stream = open_log_at(name, offset)
+    if stream is None:
+        return []
+    lines = []
+    with stream:
+        for line in stream:
+            text = line.decode("utf-8", "replace").rstrip("\n")
+            lines.append(text)
+            if line.partition(LOG_MESSAGE_SEP)[2].startswith(RUN_END_MARK) or len(lines) >= max_lines:
+                break
+    return lines
+
+
+def parse_search_date(value, end=False):
+    """Дата «ГГГГ-ММ-ДД [ЧЧ:ММ]» в unix-время; для end без времени — начало следующего дня"""
+    if not value:
+        return None
+    value = value.strip()
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            moment = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if end and fmt == "%Y-%m-%d":
+            moment += timedelta(days=1)
+        return moment.timestamp()
+    raise ValueError(f"неверная дата: {value} (ожидается ГГГГ-ММ-ДД или ГГГГ-ММ-ДД ЧЧ:ММ)")
+
+
+def search_run_logs(tid=None, since=None, until=None, failures_only=False, limit=1000):
+    """Обновить индекс и найти запуски; даты — строки «ГГГГ-ММ-ДД [ЧЧ:ММ]»"""
+    flush_logger()
+    index = LogIndex()
+    try:
+        index.update()
+        return index.search(tid, parse_search_date(since), parse_search_date(until, end=True), failures_only, limit)
+    finally:
+        index.close()
+
+
+def task_id(task):
+    """Постоянный ID задачи"""
+    return task[2]["id"]
+
+
+def new_task_id():
+    """Новый уникальный ID задачи"""
+    import uuid
+
+    while True:
+        tid = uuid.uuid4().hex[:8]
+        if tid not in tasks_by_id:
+            return tid
+
+
+def reindex_tasks():
+    """Перестроить индекс id -> задача"""
+    tasks_by_id.clear()
+    tasks_by_id.update((task_id(task), task) for task in TASKS)
+
+
+def find_task(tid):
+    """Задача по ID или None"""
+    return tasks_by_id.get(tid)
+
+
+def parse_tasks_json(data, source):
+    """Преобразовать данные JSON-файла задач в список задач; некорректные записи пропускаются"""
+    tasks = []
+    for item in data:
+        if isinstance(item, list) and len(item) == 2:
+            cron_expr, full_cmd = item
+            tasks.append((cron_expr, full_cmd, {}))
+        elif isinstance(item, list) and len(item) == 3 and isinstance(item[2], dict):
+            cron_expr, full_cmd, options = item
+            tasks.append((cron_expr, full_cmd, options))
+        else:
+            log_message(f"⚠️ Пропущена некорректная запись в {source}: {item}")
+    return tasks
+
+
+def tasks_to_json(tasks):
+    return [[cron, cmd, options] if options else [cron, cmd] for cron, cmd, options in tasks]
+
+
+UMASK = os.umask(0)  # umask процесса: прочитать его можно, только установив новый
+os.umask(UMASK)
+
+
+def copy_file_mode(tmp_path, path):
+    """Выставить временному файлу права path (mkstemp создаёт 0600), для нового файла — 0666 с учётом umask"""
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except OSError:
+        mode = 0o666 & ~UMASK
+    os.chmod(tmp_path, mode)
+
+
+def write_json_atomic(path, data):
+    """Записать JSON через временный файл и os.replace — файл никогда не остаётся недописанным"""
+    import tempfile
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".cron_task_", suffix=".tmp", dir=directory)
+    try:
+        with open(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        copy_file_mode(tmp_path, path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
 
 
 def load_tasks():
-    """Загрузить задачи из JSON-файла"""
-    global TASKS, original_tasks_order
+    """Загрузить задачи из JSON-файла (или из SQLite, если включено --db)"""
+    global TASKS
+    if task_db is not None:
+        TASKS = task_db.load()
+        log_message(f"📌 Загружено {len(TASKS)} задач из {task_db.path}")
+        reindex_tasks()  # ID в базе — первичный ключ, выдавать новые не нужно
+        return
+
     if not os.path.exists(TASKS_FILE):
         TASKS = []
         save_tasks()
-        log_message("📌 Создан новый файл задач: cron_task.json")
+        log_message(f"📌 Создан новый файл задач: {TASKS_FILE}")
     else:
+        # Повреждённый или недописанный файл не перезаписывается пустым списком:
+        # запуск прерывается, файл остаётся как есть
         try:
             with open(TASKS_FILE, "r", encoding="utf-8") as f:
                 data = json.load(f)
-                if isinstance(data, list):
-                    TASKS = []
-                    for item in data:
-                        if isinstance(item, list) and len(item) == 2:
-                            cron_expr, full_cmd = item
-                            TASKS.append((cron_expr, full_cmd))
-                        else:
-                            log_message(f"⚠️ Пропущена некорректная запись: {item}")
-                    log_message(f"📌 Загружено {len(TASKS)} задач из {TASKS_FILE}")
-                else:
-                    TASKS = []
-                    log_message("⚠️ Неверный формат файла. Ожидается список.")
-                    save_tasks()
+            if not isinstance(data, list):
+                raise ValueError("неверный формат файла, ожидается список задач")
         except Exception as e:
-            TASKS = []
-            log_message(f"❌ Ошибка чтения {TASKS_FILE}: {e}")
+            message = f"❌ Ошибка чтения {TASKS_FILE}: {e}. Файл не изменён, исправьте его и запустите снова"
+            log_message(message)
+            flush_logger()
+            raise SystemExit(1 if LOG_TO_CONSOLE else message)  # В консоль сообщение уже выведено логом
+        TASKS = parse_tasks_json(data, TASKS_FILE)
+        if shard is not None:
+            # ID выдаёт управляющий процесс, шард только читает файл
+            TASKS = [task for task in TASKS if task[2].get("id")]
+        log_message(f"📌 Загружено {len(TASKS)} задач из {TASKS_FILE}")
+        if assign_missing_ids() and shard is None:
             save_tasks()
 
-    # ✅ original_tasks_order = актуальный порядок при загрузке
-    original_tasks_order[:] = TASKS.copy()
+    reindex_tasks()
+    remember_tasks_file()
+
+
+def assign_missing_ids():
+    """Выдать ID задачам без ID или с повторяющимся ID; True — были изменения"""
+    seen = set()
+    changed = False
+    tasks_by_id.clear()
+    for i, (cron_expr, full_cmd, options) in enumerate(TASKS):
+        tid = options.get("id")
+        if not isinstance(tid, str) or not tid or tid in seen:
+            options = dict(options, id=new_task_id())
+            TASKS[i] = (cron_expr, full_cmd, options)
+            changed = True
+        seen.add(options["id"])
+        tasks_by_id[options["id"]] = TASKS[i]
+    return changed
 
 
 def save_tasks():
-    """Сохранить задачи в JSON-файл"""
+    """Сохранить все задачи (JSON — атомарная перезапись файла, SQLite — замена всех строк)"""
     try:
-        data_to_save = [[cron, cmd] for cron, cmd in TASKS]
-        with open(TASKS_FILE, "w", encoding="utf-8") as f:
-            json.dump(data_to_save, f, ensure_ascii=False, indent=2)
+        if task_db is not None:
+            task_db.replace_all(TASKS)
+            log_message(f"Задачи сохранены в {task_db.path}")
+            return
+        write_json_atomic(TASKS_FILE, tasks_to_json(TASKS))
+        remember_tasks_file()
         log_message(f"Задачи сохранены в {TASKS_FILE}")
     except Exception as e:
         log_message(f"❌ Не удалось сохранить задачи: {e}")
 
 
+def store_task(task):
+    """Сохранить одну добавленную или изменённую задачу"""
+    if task_db is None:
+        save_tasks()
+        return
+    try:
+        task_db.upsert(task)
+    except Exception as e:
+        log_message(f"❌ Не удалось сохранить задачу [#{task_id(task)}]: {e}")
+
+
+def store_delete_task(tid):
+    """Удалить одну задачу из хранилища"""
+    if task_db is None:
+        save_tasks()
+        return
+    try:
+        task_db.delete(tid)
+    except Exception as e:
+        log_message(f"❌ Не удалось удалить задачу [#{tid}]: {e}")
+
+
+class SqliteTaskStore:
+    """Задачи в SQLite (WAL): одна строка на задачу, изменения — по одной строке"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id TEXT PRIMARY KEY,
+            position INTEGER NOT NULL,
+            cron TEXT NOT NULL,
+            command TEXT NOT NULL,
+            options TEXT NOT NULL DEFAULT '{}'
+        );
+        CREATE INDEX IF NOT EXISTS tasks_position ON tasks (position);
+    """
+
+    def __init__(self, path):
+        import sqlite3
+
+        self.path = path
+        self.created = not os.path.exists(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    @staticmethod
+    def _row(task, position):
+        cron_expr, full_command, options = task
+        extra = {k: v for k, v in options.items() if k != "id"}
+        return options["id"], position, cron_expr, full_command, json.dumps(extra, ensure_ascii=False)
+
+    def load(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT id, cron, command, options FROM tasks ORDER BY position").fetchall()
+        tasks = []
+        for tid, cron_expr, full_command, options_json in rows:
+            options = {"id": tid}
+            if options_json != "{}":
+                try:
+                    options.update(json.loads(options_json))
+                except ValueError:
+                    pass
+                options["id"] = tid
+            tasks.append((cron_expr, full_command, options))
+        return tasks
+
+    def upsert(self, task):
+        """Вставить задачу в конец или обновить существующую, сохранив её позицию"""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute("SELECT position FROM tasks WHERE id = ?", (task_id(task),)).fetchone()
+            if row:
+                position = row[0]
+            else:
+                position = self._conn.execute("SELECT COALESCE(MAX(position), 0) + 1 FROM tasks").fetchone()[0]
+            self._conn.execute("INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?)", self._row(task, position))
+
+    def delete(self, tid):
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM tasks WHERE id = ?", (tid,))
+
+    def replace_all(self, tasks):
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM tasks")
+            self._conn.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?, ?)",
+                                   (self._row(task, i) for i, task in enumerate(tasks, 1)))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_task_db(path):
+    """Включить хранение задач в SQLite; новую базу заполнить из JSON-файла задач"""
+    global task_db
+    task_db = SqliteTaskStore(path)
+    if task_db.created and os.path.exists(TASKS_FILE):
+        import_tasks_json(TASKS_FILE)
+
+
+def import_tasks_json(path):
+    """Загрузить задачи из JSON-файла в текущее хранилище (с заменой)"""
+    global TASKS
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"{path}: ожидается список задач")
+    TASKS = parse_tasks_json(data, path)
+    assign_missing_ids()
+    reindex_tasks()
+    save_tasks()
+    log_message(f"📥 Импортировано {len(TASKS)} задач из {path}")
+
+
+def export_tasks_json(path):
+    """Выгрузить текущие задачи в JSON-файл"""
+    write_json_atomic(path, tasks_to_json(TASKS))
+    log_message(f"📤 Выгружено {len(TASKS)} задач в {path}")
+
+
+def find_duplicate_task(cron_expr, full_command):
+    """Задача с таким же расписанием и командой или None"""
+    for task in TASKS:
+        if task[0] == cron_expr and task[1] == full_command:
+            return task
+    return None
+
+
+def insert_task(cron_expr, full_command, options=None):
+    """Добавить задачу: список, индекс, хранилище и расписание"""
+    task = (cron_expr, full_command, dict(options or {}, id=new_task_id()))
+    TASKS.append(task)
+    tasks_by_id[task_id(task)] = task
+    store_task(task)
+    schedule_task(task)
+    log_message(f"📌 [#{task_id(task)}] Добавлена задача: {cron_expr} → {full_command}")
+    return task
+
+
+def remove_task(tid):
+    """Удалить задачу по ID; возвращает удалённую задачу или None"""
+    task = tasks_by_id.pop(tid, None)
+    if task is None:
+        return None
+    TASKS.remove(task)
+    store_delete_task(tid)
+    unschedule_task(tid)
+    log_message(f"🗑️ [#{tid}] Удалена задача: {task[0]} → {task[1]}")
+    return task
+
+
+# --- Горячая перезагрузка файла задач ---
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def remember_tasks_file():
+    """Запомнить состояние файла задач, чтобы не перечитывать собственные записи"""
+    global tasks_file_signature
+    tasks_file_signature = _file_signature(TASKS_FILE)
+
+
+def apply_task_list(new_tasks):
+    """Применить новый список задач, трогая только отличия; возвращает (добавлено, изменено, удалено)
+
+    У задач без ID (или с повторным ID) ID берётся у живой задачи с тем же
+    расписанием и командой, иначе выдаётся новый. Неизменённые задачи
+    сохраняют next_run и выполняющиеся запуски.
+    """
+    explicit = set()
+    for _, _, options in new_tasks:
+        tid = options.get("id")
+        if isinstance(tid, str) and tid and tid not in explicit:
+            explicit.add(tid)
+
+    # Под schedule_cond: поток планировщика (hold_lease → setup_schedules) читает те же структуры
+    with schedule_cond:
+        reusable = {}  # (cron, команда) -> [ID живых задач, не занятых в новом файле]
+        for task in TASKS:
+            if task_id(task) not in explicit:
+                reusable.setdefault((task[0], task[1]), []).append(task_id(task))
+
+        result = []
+        seen = set()
+        assigned = False
+        for cron_expr, full_command, options in new_tasks:
+            tid = options.get("id")
+            if not isinstance(tid, str) or not tid or tid in seen:
+                if shard is not None:
+                    continue  # ID выдаст управляющий процесс, задача придёт со следующим изменением файла
+                candidates = reusable.get((cron_expr, full_command))
+                tid = candidates.pop(0) if candidates else new_task_id()
+                options = dict(options, id=tid)
+                assigned = True
+            seen.add(tid)
+            result.append((cron_expr, full_command, options))
+
+        added = [task for task in result if task_id(task) not in tasks_by_id]
+        changed = [task for task in result if task_id(task) in tasks_by_id and tasks_by_id[task_id(task)] != task]
+        removed = [tid for tid in tasks_by_id if tid not in seen]
+
+        TASKS[:] = result
+        reindex_tasks()
+        mark_task_row()  # Порядок строк мог измениться
+        for tid in removed:
+            unschedule_task(tid)
+        for task in added + changed:
+            schedule_task(task)
+
+    if assigned:
+        save_tasks()
+    return added, changed, removed
+
+
+def reload_tasks_file():
+    """Перечитать файл задач, если он изменился; битый файл не трогает текущее расписание"""
+    global tasks_file_signature
+    signature = _file_signature(TASKS_FILE)
+    if signature is None or signature == tasks_file_signature:
+        return
+
+    try:
+        with open(TASKS_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, list):
+            raise ValueError("ожидается список задач")
+    except Exception as e:
+        tasks_file_signature = signature  # Не повторять ошибку до следующего изменения
+        log_message(f"❌ Изменения {TASKS_FILE} не применены, расписание не изменено: {e}")
+        return
+
+    tasks_file_signature = signature
+    added, changed, removed = apply_task_list(parse_tasks_json(data, TASKS_FILE))
+    if added or changed or removed:
+        log_message(f"🔁 {TASKS_FILE} перечитан: добавлено {len(added)}, "
+                    f"изменено {len(changed)}, удалено {len(removed)}")
+        for cron_expr, full_command, options in added + changed:
+            log_message(f"📌 [#{options['id']}] Задача запланирована: {cron_expr} → {full_command}")
+
+
+def _open_inotify(directory):
+    """Дескриптор inotify для каталога (Linux) или None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if fd < 0:
+            return None
+        in_modify, in_close_write, in_moved_to, in_create = 0x2, 0x8, 0x80, 0x100
+        mask = in_modify | in_close_write | in_moved_to | in_create
+        if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+def _inotify_names(fd):
+    """Имена файлов из накопившихся событий inotify"""
+    names = set()
+    try:
+        data = os.read(fd, 65536)
+    except BlockingIOError:
+        return names
+    offset = 0
+    while offset + 16 <= len(data):
+        _, _, _, length = struct.unpack_from("iIII", data, offset)
+        name = data[offset + 16:offset + 16 + length].rstrip(b"\0")
+        names.add(os.fsdecode(name))
+        offset += 16 + length
+    return names
+
+
+def watch_tasks_file(on_change):
+    """Следить за файлом задач (inotify или опрос mtime/size) и вызывать on_change при изменении"""
+    directory = os.path.dirname(os.path.abspath(TASKS_FILE))
+    name = os.path.basename(TASKS_FILE)
+    fd = _open_inotify(directory)
+    try:
+        while not stop_event.is_set():
+            if fd is not None:
+                ready, _, _ = select.select([fd], [], [], SCHEDULER_MAX_SLEEP)
+                if not ready or name not in _inotify_names(fd):
+                    continue
+                time.sleep(TASKS_RELOAD_DELAY)
+                _inotify_names(fd)  # Отбросить события той же записи
+            elif stop_event.wait(TASKS_POLL_INTERVAL):
+                break
+
+            if _file_signature(TASKS_FILE) != tasks_file_signature:
+                on_change()
+    finally:
+        if fd is not None:
+            os.close(fd)
+
+
+def start_tasks_watcher(on_change=reload_tasks_file):
+    """Запустить фоновое наблюдение за JSON-файлом задач (для SQLite не нужно)"""
+    if task_db is not None:
+        return None
+    thread = threading.Thread(target=watch_tasks_file, args=(on_change,), daemon=True, name="tasks-watcher")
+    thread.start()
+    return thread
+
+
 def detect_and_decode(data_bytes) -> str:
     """Автоматически определить кодировку и декодировать"""
     if not data_bytes:
@@ -151,6 +1211,8 @@ def detect_and_decode(data_bytes) -> str:
     except UnicodeDecodeError:
         pass
 
+    import chardet  # pip install chardet
+
     detected = chardet.detect(data_bytes)
     encoding = detected.get('encoding', 'utf-8')
 
@@ -165,26 +1227,855 @@ def detect_and_decode(data_bytes) -> str:
         return data_bytes.decode('utf-8', errors='replace')
 
 
-def run_script(full_command_str):
-    """Выполнение команды с ID задачи и атомарной записью в лог"""
-    start_time = time.time()
-    timestamp = datetime.now().strftime("%H:%M:%S")
+# --- Определение кодировки вывода ---
+DETECT_SAMPLE_BYTES = 1024  # Объём не-UTF-8 вывода, после которого кодировка фиксируется
+detected_encodings = {}  # (id задачи, 'out'|'err') -> кодировка, найденная в прошлых запусках (хранится в истории)
+
+
+class StreamDecoder:
+    """Декодер одного потока: кодировка определяется один раз по образцу и затем переиспользуется"""
+
+    def __init__(self, encoding=None, fixed=False):
+        self.encoding = encoding
+        self.fixed = fixed and bool(encoding)  # Кодировка задана в задаче — не переопределять
+        self._detector = None
+        self._sample = 0
+
+    def decode(self, data):
+        if self.fixed:
+            try:
+                return data.decode(self.encoding)
+            except (UnicodeDecodeError, LookupError):
+                try:
+                    return data.decode(self.encoding, errors='replace')
+                except LookupError:
+                    return data.decode('utf-8', errors='replace')
+
+        if data.isascii():
+            return data.decode('ascii')
+
+        # Строгий UTF-8 — раньше запомненной однобайтовой кодировки: cp1251 и
+        # подобные декодируют почти любые байты и превратили бы UTF-8 в кракозябры
+        try:
+            text = data.decode('utf-8')
+            self.encoding = 'utf-8'
+            return text
+        except UnicodeDecodeError:
+            pass
 
-    task_id_str = ""
-    for i, (cron, cmd) in enumerate(TASKS):
-        if cmd == full_command_str:
-            task_id_str = f"[#{i}] "
+        if self.encoding and self.encoding != 'utf-8':
+            try:
+                return data.decode(self.encoding)
+            except (UnicodeDecodeError, LookupError):
+                pass
+        self.encoding = None  # Кодировка сменилась — определяем заново
+
+        # Не UTF-8: копим образец, пока детектор не будет уверен
+        if self._detector is None:
+            import chardet  # pip install chardet
+            self._detector = chardet.UniversalDetector()
+        self._detector.feed(data)
+        self._sample += len(data)
+        if self._detector.done or self._sample >= DETECT_SAMPLE_BYTES:
+            self._detector.close()
+            encoding = self._detector.result.get('encoding')
+            self._detector = None
+            self._sample = 0
+            if encoding:
+                try:
+                    text = data.decode(encoding)
+                    self.encoding = encoding
+                    return text
+                except (UnicodeDecodeError, LookupError):
+                    pass
+
+        return detect_and_decode(data)
+
+
+# --- Общий цикл asyncio для дочерних процессов ---
+PIPE_CHUNK_SIZE = 65536
+PIPE_LINE_LIMIT = 65536  # Байт: строка длиннее без перевода строки отдаётся частями
+_process_loop = None
+_process_loop_lock = threading.Lock()
+
+
+def get_process_loop():
+    """Цикл asyncio в отдельном потоке — читает вывод всех дочерних процессов"""
+    global _process_loop
+    with _process_loop_lock:
+        if _process_loop is None:
+            import asyncio
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, daemon=True, name="process-loop").start()
+            _process_loop = loop
+        return _process_loop
+
+
+async def _pump_stream(stream, kind, on_line):
+    """Читать поток кусками и отдавать строки по мере поступления
+
+    Перевод строки ищется только в новом куске; незавершённая строка длиннее
+    PIPE_LINE_LIMIT отдаётся частями, поэтому буфер не растёт без предела.
+    """
+    pending = bytearray()
+    while True:
+        chunk = await stream.read(PIPE_CHUNK_SIZE)
+        if not chunk:
             break
-    if not task_id_str:
-        task_id_str = "[#?]"  # Неизвестный ID
+        *lines, tail = chunk.split(b"\n")
+        if lines and pending:
+            pending += lines[0]
+            lines[0] = bytes(pending)
+            pending.clear()
+        for line in lines:
+            on_line(kind, line)
+        pending += tail
+        while len(pending) >= PIPE_LINE_LIMIT:
+            on_line(kind, bytes(pending[:PIPE_LINE_LIMIT]))
+            del pending[:PIPE_LINE_LIMIT]
+    if pending:
+        on_line(kind, bytes(pending))
+
+
+# --- Ограничения запуска: тайм-аут и лимиты ресурсов ---
+DEFAULT_TIMEOUT = float(os.environ.get("CRON_TASK_TIMEOUT", "0"))  # Сек на запуск (0 — без ограничения)
+DEFAULT_CPU_LIMIT = int(os.environ.get("CRON_TASK_CPU_LIMIT", "0"))  # Сек процессорного времени
+DEFAULT_MEMORY_LIMIT = int(os.environ.get("CRON_TASK_MEMORY_LIMIT", "0"))  # МБ адресного пространства
+DEFAULT_FILES_LIMIT = int(os.environ.get("CRON_TASK_FILES_LIMIT", "0"))  # Открытых файлов
+TIMEOUT_KILL_GRACE = 5  # Сек между SIGTERM и SIGKILL группе процессов
+CPU_LIMIT_GRACE = 5  # Жёсткий лимит CPU выше мягкого: сначала SIGXCPU, потом SIGKILL
+
+
+class TaskTimeout(Exception):
+    """Запуск превысил тайм-аут; группа процессов уже завершена"""
+
+    def __init__(self, timeout, return_code):
+        super().__init__(f"превышено время выполнения ({timeout:g} с)")
+        self.timeout = timeout
+        self.return_code = return_code
+
+
+def _option_number(options, name, default, kind=float):
+    try:
+        value = kind(options.get(name, default))
+    except (TypeError, ValueError):
+        value = default
+    return value if value > 0 else 0
+
+
+def task_limits(options):
+    """Тайм-аут (сек, 0 — нет) и лимиты ресурсов [(ресурс, мягкий, жёсткий), ...] задачи"""
+    timeout = _option_number(options, "timeout", DEFAULT_TIMEOUT)
+    cpu = _option_number(options, "cpu_limit", DEFAULT_CPU_LIMIT, int)
+    memory = _option_number(options, "memory_limit", DEFAULT_MEMORY_LIMIT, int)
+    files = _option_number(options, "files_limit", DEFAULT_FILES_LIMIT, int)
+    if os.name == "nt" or not (cpu or memory or files):
+        return timeout, []
+
+    import resource
+
+    wanted = []
+    if cpu:
+        wanted.append((resource.RLIMIT_CPU, cpu, cpu + CPU_LIMIT_GRACE))
+    if memory:
+        wanted.append((resource.RLIMIT_AS, memory * 1024 * 1024, memory * 1024 * 1024))
+    if files:
+        wanted.append((resource.RLIMIT_NOFILE, files, files))
+
+    limits = []
+    for name, soft, hard in wanted:
+        _, current_hard = resource.getrlimit(name)
+        if current_hard != resource.RLIM_INFINITY:
+            hard = min(hard, current_hard)  # Поднять жёсткий лимит без прав root нельзя
+            soft = min(soft, hard)
+        limits.append((name, soft, hard))
+    return timeout, limits
+
+
+# Обёртка для систем без prlimit: ставит лимиты себе и заменяется командой через exec
+LIMITS_WRAPPER = ("import json, os, resource, sys\n"
+                  "for name, soft, hard in json.loads(sys.argv[1]):\n"
+                  "    resource.setrlimit(name, (soft, hard))\n"
+                  "os.execvp(sys.argv[2], sys.argv[2:])\n")
+
+
+def apply_limits(limits, pid=None):
+    """Выставить лимиты ресурсов текущему процессу или, через prlimit, уже запущенному pid"""
+    import resource
+
+    for name, soft, hard in limits:
+        if pid is None:
+            resource.setrlimit(name, (soft, hard))
+            continue
+        try:
+            resource.prlimit(pid, name, (soft, hard))
+        except ProcessLookupError:
+            return  # Процесс уже завершился
+
+
+def limited_command(args, limits):
+    """Команда и признак «лимиты ставить через prlimit после запуска»
+
+    preexec_fn небезопасен в многопоточной программе, поэтому лимиты ставятся
+    снаружи: в Linux — prlimit сразу после запуска, в остальных системах —
+    короткая обёртка на Python перед exec самой команды.
+    """
+    if not limits:
+        return args, False
+    import resource
+
+    if hasattr(resource, "prlimit"):
+        return args, True
+    return [sys.executable, "-S", "-c", LIMITS_WRAPPER, json.dumps(limits), *args], False
+
+
+def _kill_group(pid, sig):
+    """Послать сигнал всей группе процессов запуска (в Windows — только процессу)"""
+    try:
+        if os.name == "nt":
+            os.kill(pid, sig)
+        else:
+            os.killpg(pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def _guard_timeout(work, timeout, pid, exit_code):
+    """Дождаться work; по тайм-ауту завершить группу процессов pid и поднять TaskTimeout
+
+    exit_code() — корутина, возвращающая код возврата, если work пришлось
+    отменить (вывод держит потомок, вышедший из группы).
+    """
+    import asyncio
+    import signal
+
+    task = asyncio.ensure_future(work)
+    if not timeout:
+        return await task
+    done, _ = await asyncio.wait({task}, timeout=timeout)
+    if done:
+        return task.result()
+
+    for sig in (signal.SIGTERM, getattr(signal, "SIGKILL", signal.SIGTERM)):
+        _kill_group(pid, sig)
+        done, _ = await asyncio.wait({task}, timeout=TIMEOUT_KILL_GRACE)
+        if done:
+            break
+    if done:
+        return_code = task.result()
+    else:
+        task.cancel()
+        try:
+            return_code = await asyncio.wait_for(exit_code(), TIMEOUT_KILL_GRACE)
+        except Exception:
+            return_code = None
+    raise TaskTimeout(timeout, return_code)
+
+
+async def stream_process(args, on_line, on_spawn=None, timeout=0, limits=()):
+    """Запустить процесс и одновременно читать stdout и stderr; вернуть код возврата.
+
+    on_line(kind, line) вызывается в потоке цикла в порядке поступления строк,
+    kind — 'out' или 'err'. on_spawn() — сразу после создания процесса.
+    Процесс запускается в своей группе, и по тайм-ауту завершается вся группа
+    (TaskTimeout); limits ставятся без preexec_fn (см. limited_command).
+    """
+    import asyncio
+
+    args, use_prlimit = limited_command(args, limits)
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=os.name != "nt",
+    )
+    if use_prlimit:
+        apply_limits(limits, process.pid)
+    metrics.running_children += 1  # Меняется только в потоке цикла
+    try:
+        if on_spawn:
+            on_spawn()
+
+        async def finish():
+            await asyncio.gather(
+                _pump_stream(process.stdout, "out", on_line),
+                _pump_stream(process.stderr, "err", on_line),
+            )
+            return await process.wait()
+
+        return await _guard_timeout(finish(), timeout, process.pid, process.wait)
+    finally:
+        metrics.running_children -= 1
+
+
+# --- Тёплый запуск Python-скриптов (по образцу forkserver) ---
+WARM_PRELOAD = [name for name in os.environ.get(
+    "CRON_TASK_WARM_PRELOAD", "argparse,json,logging,datetime,re,subprocess,pathlib").split(",") if name]
+WARM_START_TIMEOUT = 10  # Сек на запуск сервера тёплого интерпретатора
+PYTHON_COMMAND_RE = re.compile(r"^python(\d+(\.\d+)*)?(\.exe)?$", re.IGNORECASE)
+
+
+def is_python_script(args):
+    """Команда вида `python script.py ...` (без -c/-m и ключей интерпретатора) для нашего интерпретатора
+
+    Тёплый сервер — это sys.executable, поэтому подходит только команда,
+    которая находит тот же файл в том же каталоге: интерпретатор другого
+    venv (симлинк на тот же файл) видит другие site-packages.
+    """
+    if len(args) < 2 or args[1].startswith("-") or PYTHON_COMMAND_RE.match(os.path.basename(args[0])) is None:
+        return False
+    import shutil
+
+    found = shutil.which(args[0])
+    if not found or not sys.executable:
+        return False
+    found, own = os.path.abspath(found), os.path.abspath(sys.executable)
+    try:
+        return os.path.dirname(found) == os.path.dirname(own) and os.path.samefile(found, own)
+    except OSError:
+        return False
+
+
+def _warm_child(request, fds):
+    """Дочерний процесс сервера: выполнить скрипт как `python script.py` и выйти"""
+    import atexit as child_atexit
+    import runpy
+    import signal
+    import traceback
+    import zipfile
+
+    code = 0
+    script = None
+    try:
+        signal.set_wakeup_fd(-1)
+        for signum in (signal.SIGCHLD, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(fds[0], 1)
+        os.dup2(fds[1], 2)
+        for fd in (devnull, *fds):
+            os.close(fd)
+        sys.stdin = open(0, "r", closefd=False)
+        sys.stdout = open(1, "w", closefd=False)
+        sys.stderr = open(2, "w", closefd=False, errors="backslashreplace", buffering=1)
+        os.setsid()
+        apply_limits(request.get("limits", ()))  # Сервер однопоточный — в fork это безопасно
+        os.chdir(request["cwd"])
+        script = os.path.abspath(request["argv"][0])
+        sys.argv = list(request["argv"])
+        sys.path[0] = os.path.dirname(script)
+        if os.path.isfile(script) and not zipfile.is_zipfile(script):
+            # Как `python script.py`: sys.argv[0] — как в команде, __file__ — абсолютный путь
+            # (runpy.run_path подменил бы sys.argv[0] на абсолютный путь)
+            import types
+
+            main_module = types.ModuleType("__main__")
+            main_module.__file__ = script
+            main_module.__cached__ = None
+            sys.modules["__main__"] = main_module
+            with open(script, "rb") as f:
+                compiled = compile(f.read(), script, "exec")
+            exec(compiled, main_module.__dict__)
+        else:
+            runpy.run_path(script, run_name="__main__")  # Каталог или zip-архив с __main__.py
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException as e:
+        # Как у обычного интерпретатора: трассировка начинается с кадров самого скрипта
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != script:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb or e.__traceback__)
+        code = 1
+    finally:
+        try:
+            child_atexit._run_exitfuncs()
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code & 0xFF)
+
+
+def warm_server(address):
+    """Сервер тёплого интерпретатора: модули загружены заранее, на каждый запуск — fork
+
+    Запрос приходит по Unix-сокету: JSON {argv, cwd} и дескрипторы stdout/stderr.
+    В ответ сервер пишет `pid N`, а после завершения процесса — `exit КОД`.
+    Однопоточный: ожидание детей — по SIGCHLD через wakeup-дескриптор.
+    """
+    import importlib
+    import signal
+    import socket
+
+    for name in WARM_PRELOAD:
+        try:
+            importlib.import_module(name.strip())
+        except Exception:
+            pass
+
+    parent = os.getppid()
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(address)
+    listener.listen(64)
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_r, False)
+    os.set_blocking(wake_w, False)
+    signal.set_wakeup_fd(wake_w)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+    children = {}  # pid -> соединение, ждущее код возврата
+
+    sys.stdout.write("ready\n")
+    sys.stdout.flush()
+
+    while os.getppid() == parent:
+        ready, _, _ = select.select([listener, wake_r], [], [], 1)
+        if wake_r in ready:
+            try:
+                os.read(wake_r, 4096)
+            except BlockingIOError:
+                pass
+        if listener in ready:
+            conn, _ = listener.accept()
+            try:
+                message, fds, _, _ = socket.recv_fds(conn, 65536, 2)
+                request = json.loads(message)
+            except (OSError, ValueError):
+                conn.close()
+                continue
+            pid = os.fork()
+            if pid == 0:
+                listener.close()
+                conn.close()
+                os.close(wake_r)
+                os.close(wake_w)
+                _warm_child(request, fds)
+            for fd in fds:
+                os.close(fd)
+            children[pid] = conn
+            conn.sendall(f"pid {pid}\n".encode())
+
+        while children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            conn = children.pop(pid, None)
+            if conn:
+                try:
+                    conn.sendall(f"exit {os.waitstatus_to_exitcode(status)}\n".encode())
+                except OSError:
+                    pass
+                conn.close()
+    listener.close()
+
+
+class WarmRunner:
+    """Клиент сервера тёплого интерпретатора; сервер запускается при первом запуске"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._proc = None
+        self._dir = None
+        self.address = None
+        self.failed = False
+
+    def ensure(self):
+        """Запустить сервер, если он не работает; False — тёплый запуск недоступен"""
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                return True
+            if self.failed or os.name == "nt" or not hasattr(os, "fork"):
+                return False
+            try:
+                self._start()
+            except Exception as e:
+                self.failed = True
+                log_message(f"⚠️ Тёплый запуск Python недоступен, используется обычный: {e}")
+                return False
+            return True
+
+    def _start(self):
+        import shutil
+        import tempfile
+
+        if self._dir:
+            shutil.rmtree(self._dir, ignore_errors=True)
+        self._dir = tempfile.mkdtemp(prefix="cron_task_warm_")
+        self.address = os.path.join(self._dir, "server.sock")
+        self._proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--warm-server", self.address],
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE)
+        ready, _, _ = select.select([self._proc.stdout], [], [], WARM_START_TIMEOUT)
+        if not ready or self._proc.stdout.readline().strip() != b"ready":
+            self._proc.kill()
+            raise RuntimeError("сервер не ответил")
+        log_message(f"🔥 Сервер тёплого Python запущен, PID {self._proc.pid}")
+        atexit.register(self.stop)
+
+    def stop(self):
+        import shutil
+
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                self._proc.terminate()
+            if self._dir:
+                shutil.rmtree(self._dir, ignore_errors=True)
+                self._dir = None
+
+
+warm_runner = WarmRunner()
+
+
+async def _open_pipe_reader(fd):
+    import asyncio
+
+    reader = asyncio.StreamReader(limit=PIPE_CHUNK_SIZE * 2)
+    transport, _ = await asyncio.get_running_loop().connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), open(fd, "rb", buffering=0))
+    return reader, transport
+
+
+async def stream_warm_process(args, on_line, on_spawn=None, timeout=0, limits=()):
+    """То же, что stream_process, но процесс — fork тёплого интерпретатора"""
+    import asyncio
+    import socket
+
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, warm_runner.address)
+        sock.setblocking(True)
+        request = json.dumps({"argv": args[1:], "cwd": os.getcwd(), "limits": list(limits)}).encode()
+        socket.send_fds(sock, [request], [out_w, err_w])
+        sock.setblocking(False)
+    except BaseException:
+        sock.close()
+        for fd in (out_r, err_r):
+            os.close(fd)
+        raise
+    finally:
+        os.close(out_w)
+        os.close(err_w)
+
+    status, writer = await asyncio.open_unix_connection(sock=sock)
+    transports = []
+    try:
+        out, transport = await _open_pipe_reader(out_r)
+        transports.append(transport)
+        err, transport = await _open_pipe_reader(err_r)
+        transports.append(transport)
+        reply = await status.readline()
+        if not reply.startswith(b"pid "):
+            raise RuntimeError("сервер тёплого Python не запустил процесс")
+        pid = int(reply.split()[1])
+
+        async def exit_code():
+            reply = await status.readline()
+            if not reply.startswith(b"exit "):
+                raise RuntimeError("сервер тёплого Python не вернул код завершения")
+            return int(reply.split()[1])
+
+        async def finish():
+            await asyncio.gather(
+                _pump_stream(out, "out", on_line),
+                _pump_stream(err, "err", on_line),
+            )
+            return await exit_code()
+
+        metrics.running_children += 1
+        try:
+            if on_spawn:
+                on_spawn()
+            return await _guard_timeout(finish(), timeout, pid, exit_code)
+        finally:
+            metrics.running_children -= 1
+    finally:
+        for transport in transports:
+            transport.close()
+        writer.close()
+
+
+# --- Захват вывода задачи ---
+OUTPUT_MEMORY_LIMIT = int(os.environ.get("CRON_TASK_OUTPUT_LIMIT", str(1024 * 1024)))  # Байт в памяти на запуск
+OUTPUT_HEAD_LINES = 20  # Сколько первых строк оставить в основном логе при сбросе на диск
+OUTPUT_TAIL_LINES = 20  # Сколько последних строк оставить в основном логе
+OUTPUT_LINE_LIMIT = 4096  # Байт строки в основном логе; длиннее — обрезается, полностью только в файле
+
+
+class OutputCapture:
+    """Буфер вывода запуска с ограничением памяти и сбросом на диск
+
+    Пока объём не превышает OUTPUT_MEMORY_LIMIT, строки хранятся в памяти.
+    После превышения весь вывод пишется в отдельный файл в LOG_DIR,
+    а в памяти остаются только первые и последние строки. Строка длиннее
+    OUTPUT_LINE_LIMIT сразу включает сброс: в памяти остаётся её начало.
+    """
+
+    def __init__(self, limit=None):
+        self.limit = OUTPUT_MEMORY_LIMIT if limit is None else limit
+        self.lines = []
+        self.size = 0
+        self.total_lines = 0
+        self.total_bytes = 0
+        self.spill_path = None
+        self._spill_file = None
+        self._tail = None
+
+    def append(self, msg):
+        size = len(msg.encode("utf-8")) + 1
+        self.total_lines += 1
+        self.total_bytes += size
+
+        if self._spill_file is None and size <= OUTPUT_LINE_LIMIT:
+            self.lines.append(msg)
+            self.size += size
+            if self.size > self.limit:
+                self._spill()
+            return
+
+        if self._spill_file is None:
+            self._spill()
+        self._spill_file.write(msg + "\n")
+        self._tail.append(self._clip(msg, size) if size > OUTPUT_LINE_LIMIT else msg)
+
+    @staticmethod
+    def _clip(msg, size):
+        """Начало длинной строки (до OUTPUT_LINE_LIMIT байт) с пометкой об обрезке"""
+        head = msg.encode("utf-8")[:OUTPUT_LINE_LIMIT].decode("utf-8", "ignore")
+        return f"{head} ✂️ (+{size - 1 - len(head.encode('utf-8'))} байт)"
+
+    def _spill(self):
+        import tempfile
+
+        stamp = datetime.now().strftime("%Y-%m-%d_%H%M%S")
+        try:
+            fd, self.spill_path = tempfile.mkstemp(prefix=f"run_{stamp}_", suffix=".log", dir=LOG_DIR)
+            self._spill_file = open(fd, "w", encoding="utf-8")
+        except OSError:
+            # Не удалось создать файл — оставляем только начало и конец вывода
+            self.spill_path = None
+            self._spill_file = open(os.devnull, "w", encoding="utf-8")
+
+        self._spill_file.writelines(line + "\n" for line in self.lines)
+        self._tail = deque(self.lines[OUTPUT_HEAD_LINES:], maxlen=OUTPUT_TAIL_LINES)
+        del self.lines[OUTPUT_HEAD_LINES:]
+
+    def close(self):
+        """Закрыть файл и вернуть строки для основного лога (не больше head + tail + 1)"""
+        if self._spill_file is None:
+            return self.lines
+
+        self._spill_file.close()
+        skipped = self.total_lines - len(self.lines) - len(self._tail)
+        where = f"полный вывод: {self.spill_path}" if self.spill_path else "полный вывод не сохранён"
+        note = (f"│ ✂️ Пропущено строк: {skipped} (всего {self.total_bytes} байт), {where}")
+        return self.lines + [note] + list(self._tail)
+
+
+# --- История запусков ---
+HISTORY_FILE = "run_history.db"
+run_history = None  # RunHistory, если история запусков включена
+run_summary = {}  # id задачи -> [последняя длительность, запусков, успешных]
+
+
+def _percentile(sorted_values, q):
+    """Перцентиль по ближайшему рангу из отсортированного списка"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class RunHistory:
+    """Журнал запусков в SQLite (WAL): только добавление, одна строка на запуск"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY,
+            task_id TEXT NOT NULL,
+            scheduled REAL,
+            started REAL NOT NULL,
+            ended REAL NOT NULL,
+            duration REAL NOT NULL,
+            exit_code INTEGER,
+            output_bytes INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS runs_task_started ON runs (task_id, started);
+        CREATE TABLE IF NOT EXISTS encodings (
+            task_id TEXT NOT NULL,
+            stream TEXT NOT NULL,
+            encoding TEXT NOT NULL,
+            PRIMARY KEY (task_id, stream)
+        );
+    """
+
+    def __init__(self, path):
+        import sqlite3
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def record(self, tid, scheduled, started, ended, exit_code, output_bytes):
+        """Добавить запуск; scheduled — плановое время (None для ручного запуска), exit_code None — не запустился"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO runs (task_id, scheduled, started, ended, duration, exit_code, output_bytes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (tid, scheduled, started, ended, ended - started, exit_code, output_bytes))
+
+    def encodings(self):
+        """{(id задачи, 'out'|'err'): кодировка}, найденные в прошлых запусках"""
+        with self._lock:
+            rows = self._conn.execute("SELECT task_id, stream, encoding FROM encodings").fetchall()
+        return {(tid, stream): encoding for tid, stream, encoding in rows}
+
+    def save_encoding(self, tid, stream, encoding):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO encodings (task_id, stream, encoding) VALUES (?, ?, ?)",
+                               (tid, stream, encoding))
+
+    def summary(self):
+        """{id задачи: [последняя длительность, запусков, успешных]} по всей истории"""
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT task_id, COUNT(*), SUM(exit_code = 0),
+                       (SELECT duration FROM runs AS last WHERE last.task_id = runs.task_id
+                        ORDER BY last.id DESC LIMIT 1)
+                FROM runs GROUP BY task_id
+            """).fetchall()
+        return {tid: [last, count, ok or 0] for tid, count, ok, last in rows}
+
+    def task_stats(self, tid=None, since=None):
+        """Статистика по задачам: перцентили длительности, доля ошибок, опоздание старта
+
+        since — unix-время, с которого учитываются запуски. Опоздание считается
+        только для плановых запусков (started - scheduled).
+        """
+        query = "SELECT task_id, duration, exit_code, started - scheduled FROM runs WHERE 1"
+        params = []
+        if tid is not None:
+            query += " AND task_id = ?"
+            params.append(tid)
+        if since is not None:
+            query += " AND started >= ?"
+            params.append(since)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        grouped = {}
+        for task, duration, exit_code, lateness in rows:
+            item = grouped.setdefault(task, ([], [], [0]))
+            item[0].append(duration)
+            if lateness is not None:
+                item[1].append(lateness)
+            if exit_code != 0:
+                item[2][0] += 1
+
+        stats = {}
+        for task, (durations, lateness, failures) in grouped.items():
+            durations.sort()
+            lateness.sort()
+            stats[task] = {
+                "runs": len(durations),
+                "failures": failures[0],
+                "failure_rate": failures[0] / len(durations),
+                "p50": _percentile(durations, 50),
+                "p95": _percentile(durations, 95),
+                "p99": _percentile(durations, 99),
+                "late_p50": _percentile(lateness, 50),
+                "late_p95": _percentile(lateness, 95),
+                "late_max": lateness[-1] if lateness else None,
+            }
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_run_history(path=HISTORY_FILE):
+    """Включить запись истории запусков, загрузить сводку для таблицы задач и найденные кодировки"""
+    global run_history, run_summary
+    import sqlite3
+
+    try:
+        run_history = RunHistory(path)
+        run_summary = run_history.summary()
+        detected_encodings.update(run_history.encodings())
+    except sqlite3.Error as e:
+        run_history = None
+        log_message(f"⚠️ История запусков отключена ({path}): {e}")
+        return None
+    mark_task_row()
+    return run_history
+
+
+def record_run(tid, scheduled, started, ended, exit_code, output_bytes):
+    """Записать запуск в историю и обновить сводку по задаче"""
+    if run_history is None or not tid:
+        return
+    import sqlite3
+
+    try:
+        run_history.record(tid, scheduled, started, ended, exit_code, output_bytes)
+    except sqlite3.Error as e:
+        log_message(f"⚠️ [#{tid}] Запуск не записан в историю: {e}")
+        return
+    item = run_summary.setdefault(tid, [None, 0, 0])
+    item[0] = ended - started
+    item[1] += 1
+    item[2] += exit_code == 0
+    mark_task_row(tid)
+
+
+def remember_encoding(tid, kind, encoding):
+    """Запомнить кодировку потока задачи; с включённой историей — и для следующих запусков программы"""
+    if detected_encodings.get((tid, kind)) == encoding:
+        return
+    detected_encodings[(tid, kind)] = encoding
+    if run_history is None or not tid:
+        return
+    import sqlite3
+
+    try:
+        run_history.save_encoding(tid, kind, encoding)
+    except sqlite3.Error as e:
+        log_message(f"⚠️ [#{tid}] Кодировка {encoding} не сохранена в историю: {e}")
+
+
+def run_script(tid, full_command_str, options=None, scheduled=None):
+    """Выполнение команды с ID задачи и атомарной записью в лог
+
+    scheduled — плановое время запуска (datetime) для истории; None — ручной запуск.
+    """
+    options = options or {}
+    start_time = clock.time()
+    return_code = None
+    output_bytes = 0
+    timestamp = clock.now().strftime("%H:%M:%S")
+
+    task_id_str = f"[#{tid}] " if tid else "[#?]"
 
     task_header = f"{task_id_str}[{timestamp}] Задача: {full_command_str}"
 
     # Буфер вывода
-    output_lines = []
-
-    def buffer_log(msg):
-        output_lines.append(msg)
+    capture = OutputCapture()
+    buffer_log = capture.append
 
     buffer_log(f"🔄 {task_header}")
     buffer_log(f"┌───────────────────────────────")
@@ -200,202 +2091,1277 @@ def run_script(full_command_str):
             buffer_log("❌ Пустая команда")
             return
 
-        process = subprocess.Popen(
-            args,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            bufsize=0,
-        )
-
-        # Чтение stdout
-        while True:
-            line = process.stdout.readline()
-            if not line and process.poll() is not None:
-                break
-            if line:
-                decoded_line = detect_and_decode(line).strip()
-                if decoded_line:
-                    out_time = datetime.now().strftime("%H:%M:%S")
-                    buffer_log(f"│ 📤 [{out_time}] {decoded_line}")
-
-        # Чтение stderr
-        stderr_raw = process.stderr.read()
-        if stderr_raw:
-            stderr_lines = stderr_raw.splitlines()
-            for line in stderr_lines:
-                decoded_line = detect_and_decode(line).strip()
-                if decoded_line:
-                    err_time = datetime.now().strftime("%H:%M:%S")
-                    buffer_log(f"│ ❌ [{err_time}] {decoded_line}")
-
-        return_code = process.returncode
-        end_time = datetime.now().strftime("%H:%M:%S")
-        duration = time.time() - start_time
-
-        if return_code == 0:
+        forced_encoding = options.get("encoding")
+        decoders = {
+            kind: StreamDecoder(forced_encoding, fixed=True) if forced_encoding
+            else StreamDecoder(detected_encodings.get((tid, kind)))
+            for kind in ("out", "err")
+        }
+
+        def on_line(kind, line):
+            nonlocal output_bytes
+            output_bytes += len(line)
+            decoded_line = decoders[kind].decode(line).strip()
+            if decoded_line:
+                out_time = clock.now().strftime("%H:%M:%S")
+                icon = "📤" if kind == "out" else "❌"
+                buffer_log(f"│ {icon} [{out_time}] {decoded_line}")
+
+        def on_spawn():
+            metrics.record_fire(tid, scheduled, clock.time())
+
+        # stdout и stderr читаются одновременно в общем цикле asyncio
+        import asyncio
+        import signal
+
+        timeout, limits = task_limits(options)
+        if options.get("runner") == "warm" and is_python_script(args) and warm_runner.ensure():
+            coroutine = stream_warm_process(args, on_line, on_spawn, timeout, limits)
+        else:
+            coroutine = stream_process(args, on_line, on_spawn, timeout, limits)
+        future = asyncio.run_coroutine_threadsafe(coroutine, get_process_loop())
+        try:
+            return_code = future.result()
+        except TaskTimeout as e:
+            return_code = e.return_code
+            timed_out = e
+        else:
+            timed_out = None
+
+        if not forced_encoding:
+            for kind, decoder in decoders.items():
+                if decoder.encoding:
+                    remember_encoding(tid, kind, decoder.encoding)
+        end_time = clock.now().strftime("%H:%M:%S")
+        duration = clock.time() - start_time
+
+        if timed_out:
+            buffer_log(f"│ ⏰ [{end_time}] Прервана: {timed_out}, группа процессов завершена (код {return_code})")
+        elif return_code == 0:
             buffer_log(f"│ ✅ [{end_time}] Успешно завершена")
+        elif limits and return_code == -getattr(signal, "SIGXCPU", 0):
+            buffer_log(f"│ 🔥 [{end_time}] Прервана: превышен лимит процессорного времени (код {return_code})")
         else:
             buffer_log(f"│ 💥 [{end_time}] Ошибка (код {return_code})")
 
         buffer_log(f"│ ⏱️ [{end_time}] Время выполнения: {duration:.3f} сек")
 
     except Exception as e:
-        exc_time = datetime.now().strftime("%H:%M:%S")
+        exc_time = clock.now().strftime("%H:%M:%S")
         buffer_log(f"│ 💀 [{exc_time}] Исключение: {e}")
     finally:
         buffer_log(f"└───────────────────────────────")
 
+        output_lines = capture.close()
+        record_run(tid, scheduled.timestamp() if scheduled else None,
+                   start_time, clock.time(), return_code, output_bytes)
+
         # 🔐 Атомарная запись в лог
         with log_lock:
             for line in output_lines:
                 log_message(line)
-            root.after(0, update_gui)
+            if root:
+                root.after(0, update_gui)
 
 
-def setup_schedules():
-    """Настроить все cron-задачи — без лишних логов при сортировке"""
-    global scheduled_jobs
-    scheduled_jobs.clear()
-    base_time = datetime.now()
+# --- Пул выполнения задач ---
+class TokenBucket:
+    """Ограничение частоты: rate токенов в секунду, не больше burst в запасе"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def take(self):
+        """Взять токен; возвращает 0 или сколько секунд ждать до следующего"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class ExecutionPool:
+    """Ограниченный пул потоков с очередью ожидающих запусков и политикой перекрытия"""
+
+    def __init__(self, max_workers, spawn_rate=0, spawn_burst=1):
+        self.max_workers = max(1, max_workers)
+        self.bucket = TokenBucket(spawn_rate, spawn_burst) if spawn_rate > 0 else None
+        self._cond = threading.Condition()
+        self._queue = deque()  # [(key, func, args, submitted_at), ...]
+        self._queued = {}  # key -> число запусков в очереди
+        self._running = {}  # key -> число выполняющихся запусков
+        self._deferred = {}  # key -> отложенный запуск (queue_one)
+        self._workers = 0
+        self._idle = 0
+        self.counters = {
+            "submitted": 0,
+            "started": 0,
+            "completed": 0,
+            "skipped": 0,
+            "rate_limited": 0,
+            "max_queue_depth": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0,
+        }
+
+    def submit(self, key, func, args=(), policy=OVERLAP_ALLOW):
+        """Поставить запуск в очередь; возвращает 'queued', 'deferred' или 'skipped'"""
+        item = (key, func, args, time.monotonic())
+        with self._cond:
+            self.counters["submitted"] += 1
+            busy = self._running.get(key, 0) or self._queued.get(key, 0)
+
+            if busy and policy == OVERLAP_SKIP:
+                self.counters["skipped"] += 1
+                return "skipped"
+            if busy and policy == OVERLAP_QUEUE_ONE:
+                if key in self._deferred:
+                    self.counters["skipped"] += 1
+                    return "skipped"
+                self._deferred[key] = item
+                return "deferred"
+
+            self._enqueue(item)
+            return "queued"
+
+    def _enqueue(self, item):
+        key = item[0]
+        self._queue.append(item)
+        self._queued[key] = self._queued.get(key, 0) + 1
+        self.counters["max_queue_depth"] = max(self.counters["max_queue_depth"], len(self._queue))
+        if self._idle == 0 and self._workers < self.max_workers:
+            self._workers += 1
+            threading.Thread(target=self._worker, daemon=True).start()
+        else:
+            self._cond.notify()
 
-    for cron_expr, full_command in TASKS:
-        try:
-            if not croniter.is_valid(cron_expr):
+    def _worker(self):
+        while True:
+            with self._cond:
+                self._idle += 1
+                while True:
+                    while not self._queue:
+                        self._cond.wait()
+                    delay = self.bucket.take() if self.bucket else 0
+                    if not delay:
+                        break
+                    self.counters["rate_limited"] += 1
+                    self._cond.wait(delay)  # Ждём токен ограничения частоты запусков
+                self._idle -= 1
+                key, func, args, submitted_at = self._queue.popleft()
+                self._queued[key] -= 1
+                if not self._queued[key]:
+                    del self._queued[key]
+                self._running[key] = self._running.get(key, 0) + 1
+
+                wait = time.monotonic() - submitted_at
+                self.counters["started"] += 1
+                self.counters["wait_total"] += wait
+                self.counters["wait_max"] = max(self.counters["wait_max"], wait)
+
+            try:
+                func(*args)
+            except Exception as e:
+                log_message(f"💀 Ошибка пула выполнения: {e}")
+            finally:
+                with self._cond:
+                    self.counters["completed"] += 1
+                    self._running[key] -= 1
+                    if not self._running[key]:
+                        del self._running[key]
+                        deferred = self._deferred.pop(key, None)
+                        if deferred:
+                            self._enqueue(deferred)
+
+    def is_busy(self, key):
+        """Выполняется ли или ждёт в очереди запуск с этим ключом"""
+        with self._cond:
+            return bool(self._running.get(key) or self._queued.get(key) or key in self._deferred)
+
+    def stats(self):
+        """Снимок счётчиков для подбора размера пула"""
+        with self._cond:
+            stats = dict(self.counters)
+            stats["max_workers"] = self.max_workers
+            stats["running"] = sum(self._running.values())
+            stats["queue_depth"] = len(self._queue)
+            stats["deferred"] = len(self._deferred)
+            started = stats["started"]
+            stats["wait_avg"] = stats["wait_total"] / started if started else 0.0
+            return stats
+
+
+execution_pool = ExecutionPool(POOL_MAX_WORKERS, SPAWN_RATE, SPAWN_BURST)
+
+
+def submit_run(tid, full_command, options, scheduled=None):
+    """Отправить запуск задачи в пул с учётом её политики перекрытия"""
+    policy = options.get("overlap", DEFAULT_OVERLAP_POLICY)
+    if policy not in OVERLAP_POLICIES:
+        policy = DEFAULT_OVERLAP_POLICY
+    result = execution_pool.submit(tid, run_script, (tid, full_command, options, scheduled), policy)
+    if result == "skipped":
+        log_message(f"⏭️ [#{tid}] Запуск пропущен — задача ещё выполняется: {full_command}")
+    return result
+
+
+job_executor = submit_run  # Куда планировщик отправляет запуски (в симуляции — заглушка)
+
+
+# --- Метрики планировщика ---
+METRICS_HOST = "127.0.0.1"  # Метрики отдаются только локально
+LATENESS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+TICK_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)
+METRICS_CSV_FIELDS = ("task_id", "planned", "spawned", "lateness_s", "queue_depth", "running", "children",
+                      "log_backlog")
+
+
+class Histogram:
+    """Гистограмма с накопительными корзинами в формате Prometheus"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name):
+        lines = []
+        total = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            lines.append(f'{name}_bucket{{le="{bound}"}} {total}')
+        lines.append(f"{name}_sum {self.sum:.6f}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+class SchedulerMetrics:
+    """Опоздание запусков, длительность такта и состояние очередей"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lateness = Histogram(LATENESS_BUCKETS)
+        self.tick = Histogram(TICK_BUCKETS)
+        self.fires = 0
+        self.manual_fires = 0
+        self.last_lateness = 0.0
+        self.running_children = 0
+        self.csv_file = None
+        self.csv_writer = None
+
+    def open_csv(self, path):
+        """Дописывать строку на каждый запуск в CSV-файл"""
+        import csv
+
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.csv_file = open(path, "a", newline="", encoding="utf-8")
+        self.csv_writer = csv.writer(self.csv_file)
+        if new_file:
+            self.csv_writer.writerow(METRICS_CSV_FIELDS)
+            self.csv_file.flush()
+
+    def record_fire(self, tid, scheduled, spawned):
+        """Запуск процесса: scheduled — плановое время (None для ручного), spawned — unix-время старта"""
+        lateness = spawned - scheduled.timestamp() if scheduled else None
+        pool = execution_pool.stats()
+        backlog = log_backlog()
+        with self._lock:
+            if lateness is None:
+                self.manual_fires += 1
+            else:
+                self.fires += 1
+                self.last_lateness = lateness
+                self.lateness.observe(max(lateness, 0.0))
+            if self.csv_writer:
+                self.csv_writer.writerow((
+                    tid, f"{scheduled.timestamp():.3f}" if scheduled else "", f"{spawned:.3f}",
+                    f"{lateness:.3f}" if lateness is not None else "", pool["queue_depth"], pool["running"],
+                    self.running_children, backlog))
+                self.csv_file.flush()
+
+    def record_tick(self, duration):
+        with self._lock:
+            self.tick.observe(duration)
+
+    def render(self):
+        """Текст метрик в формате Prometheus"""
+        pool = execution_pool.stats()
+        gauges = (
+            ("cron_task_queue_depth", "Запуски в очереди пула", pool["queue_depth"]),
+            ("cron_task_running_runs", "Выполняющиеся запуски", pool["running"]),
+            ("cron_task_running_children", "Живые дочерние процессы", self.running_children),
+            ("cron_task_log_backlog", "Сообщения, ещё не записанные в файл лога", log_backlog()),
+            ("cron_task_scheduled_jobs", "Задания в расписании", len(scheduled_jobs)),
+        )
+        with self._lock:
+            lines = [
+                "# HELP cron_task_fire_lateness_seconds Опоздание старта процесса относительно срока cron",
+                "# TYPE cron_task_fire_lateness_seconds histogram",
+                *self.lateness.render("cron_task_fire_lateness_seconds"),
+                "# HELP cron_task_last_fire_lateness_seconds Опоздание последнего планового запуска",
+                "# TYPE cron_task_last_fire_lateness_seconds gauge",
+                f"cron_task_last_fire_lateness_seconds {self.last_lateness:.6f}",
+                "# HELP cron_task_tick_duration_seconds Длительность такта планировщика",
+                "# TYPE cron_task_tick_duration_seconds histogram",
+                *self.tick.render("cron_task_tick_duration_seconds"),
+                "# HELP cron_task_fires_total Запущенные процессы",
+                "# TYPE cron_task_fires_total counter",
+                f'cron_task_fires_total{{trigger="schedule"}} {self.fires}',
+                f'cron_task_fires_total{{trigger="manual"}} {self.manual_fires}',
+            ]
+        lines += [
+            "# HELP cron_task_skipped_total Запуски, пропущенные политикой перекрытия",
+            "# TYPE cron_task_skipped_total counter",
+            f"cron_task_skipped_total {pool['skipped']}",
+            "# HELP cron_task_queue_wait_seconds_max Наибольшее ожидание в очереди пула",
+            "# TYPE cron_task_queue_wait_seconds_max gauge",
+            f"cron_task_queue_wait_seconds_max {pool['wait_max']:.6f}",
+        ]
+        for name, help_text, value in gauges:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+metrics = SchedulerMetrics()
+
+
+def log_backlog():
+    """Сообщения в очереди LogWriter, ещё не записанные на диск"""
+    writer = log_writer
+    return writer.queue.qsize() if writer else 0
+
+
+def start_metrics_server(port):
+    """HTTP-сервер метрик на localhost (GET /metrics) в фоновом потоке"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Запросы метрик не пишем в лог
+
+    server = ThreadingHTTPServer((METRICS_HOST, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    log_message(f"📈 Метрики: http://{METRICS_HOST}:{server.server_port}/metrics")
+    return server
+
+
+# --- Компилированные cron-выражения ---
+CRON_FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+CRON_MONTH_NAMES = {name: i for i, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1)}
+CRON_DOW_NAMES = {name: i for i, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])}
+CRON_ALIASES = {
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+CRON_MAX_YEARS = 50  # Как max_years_between_matches в croniter
+_cron_element_re = re.compile(r"^(\*|[0-9a-z]+)(?:-([0-9a-z]+))?(?:/([0-9]+))?$")
+_cron_cache = {}  # expr -> CronSpec | _CroniterSpec | None
+
+
+@lru_cache(maxsize=4096)
+def _month_info(year, month):
+    """(cron-день недели 1-го числа, маска допустимых дней месяца)"""
+    first_wd, dim = calendar.monthrange(year, month)
+    return (first_wd + 1) % 7, ((1 << (dim + 1)) - 1) & ~1
+
+
+def _next_bit(mask, start):
+    """Номер младшего установленного бита >= start или -1"""
+    rest = mask >> start
+    if not rest:
+        return -1
+    return start + (rest & -rest).bit_length() - 1
+
+
+def _parse_cron_field(field, index):
+    """Разобрать поле cron в битовую маску; None — синтаксис не поддерживается"""
+    low_limit, high_limit = CRON_FIELD_RANGES[index]
+    names = CRON_MONTH_NAMES if index == 3 else CRON_DOW_NAMES if index == 4 else {}
+
+    def value(token):
+        if token.isdigit():
+            val = int(token)
+        elif token in names:
+            val = names[token]
+        else:
+            return None
+        if index == 4 and val == 7:
+            val = 0
+        return val if low_limit <= val <= high_limit else None
+
+    mask = 0
+    for element in field.split(","):
+        m = _cron_element_re.match(element)
+        if not m:
+            return None
+        start, end, step = m.groups()
+        step = int(step) if step else 1
+        if step == 0:
+            return None
+        if start == "*":
+            if end is not None:
+                return None
+            low, high = low_limit, high_limit
+        else:
+            low = value(start)
+            if low is None:
+                return None
+            if end is not None:
+                high = value(end)
+                # Обратные и вырожденные диапазоны croniter трактует особо
+                if high is None or high <= low:
+                    return None
+            elif m.group(3):
+                high = high_limit
+            else:
+                high = low
+        for v in range(low, high + 1, step):
+            mask |= 1 << v
+    return mask
+
+
+class CronSpec:
+    """Cron-выражение из 5 полей, скомпилированное в битовые маски"""
+    __slots__ = ("expr", "minutes", "hours", "days", "months", "weekdays", "day_or", "_dow_day_masks")
+
+    def __init__(self, expr, minutes, hours, days, months, weekdays, day_or):
+        self.expr = expr
+        self.minutes = minutes
+        self.hours = hours
+        self.days = days
+        self.months = months
+        self.weekdays = weekdays
+        self.day_or = day_or
+        # Маска дней месяца для каждого дня недели 1-го числа (0=вс)
+        self._dow_day_masks = []
+        for first in range(7):
+            mask = 0
+            for d in range(1, 32):
+                if weekdays >> ((first + d - 1) % 7) & 1:
+                    mask |= 1 << d
+            self._dow_day_masks.append(mask)
+
+    def _month_days(self, year, month):
+        first, valid = _month_info(year, month)
+        dow_mask = self._dow_day_masks[first]
+        if self.day_or:
+            return (self.days | dow_mask) & valid
+        return self.days & dow_mask & valid
+
+    def next_after(self, dt):
+        """Ближайший момент запуска строго после dt (как croniter.get_next)"""
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        year, month, day, hour, minute = t.year, t.month, t.day, t.hour, t.minute
+        end_year = year + CRON_MAX_YEARS
+
+        while year <= end_year:
+            m = _next_bit(self.months, month)
+            if m < 0:
+                year, month, day, hour, minute = year + 1, 1, 1, 0, 0
+                continue
+            if m != month:
+                month, day, hour, minute = m, 1, 0, 0
+
+            d = _next_bit(self._month_days(year, month), day)
+            if d < 0:
+                month, day, hour, minute = month + 1, 1, 0, 0
+                if month > 12:
+                    year, month = year + 1, 1
                 continue
+            if d != day:
+                day, hour, minute = d, 0, 0
 
-            cron_iter = croniter(cron_expr, base_time)
-            next_run = cron_iter.get_next(datetime)
+            h = _next_bit(self.hours, hour)
+            if h < 0:
+                day, hour, minute = day + 1, 0, 0
+                continue
+            if h != hour:
+                hour, minute = h, 0
+
+            mi = _next_bit(self.minutes, minute)
+            if mi < 0:
+                hour, minute = hour + 1, 0
+                continue
+            return datetime(year, month, day, hour, mi)
+
+        raise ValueError(f"Нет запусков за {CRON_MAX_YEARS} лет: {self.expr}")
+
+    def count_between(self, after, until):
+        """Число сроков s, after < s <= until, — по маскам дней, без перебора самих сроков"""
+        after = after.replace(second=0, microsecond=0)
+        until = until.replace(second=0, microsecond=0)
+        if until <= after:
+            return 0
+        full_day = bin(self.hours).count("1") * bin(self.minutes).count("1")
+        first_day, last_day = after.date(), until.date()
+        count = 0
+        month_key = days = None
+        day = first_day
+        while day <= last_day:
+            if (day.year, day.month) != month_key:
+                month_key = (day.year, day.month)
+                days = self._month_days(day.year, day.month) if self.months >> day.month & 1 else 0
+            if days >> day.day & 1:
+                low = after.hour * 60 + after.minute if day == first_day else -1
+                high = until.hour * 60 + until.minute if day == last_day else 1439
+                count += full_day if low < 0 and high == 1439 else self._count_in_day(low, high)
+            day += timedelta(days=1)
+        return count
+
+    def _count_in_day(self, low, high):
+        """Число сроков в сутках между минутами дня low (не включая) и high (включая)"""
+        count = 0
+        for hour in range(max(low, 0) // 60, high // 60 + 1):
+            if not self.hours >> hour & 1:
+                continue
+            mask = self.minutes
+            if low >= 0 and hour == low // 60:
+                mask &= ~((1 << (low % 60 + 1)) - 1)
+            if hour == high // 60:
+                mask &= (1 << (high % 60 + 1)) - 1
+            count += bin(mask).count("1")
+        return count
+
+
+class _CroniterSpec:
+    """Запасной вариант для синтаксиса, который не компилируется в маски (L, W, #, секунды...)"""
+    __slots__ = ("expr",)
+
+    def __init__(self, expr):
+        self.expr = expr
+
+    def next_after(self, dt):
+        from croniter import croniter
+
+        return croniter(self.expr, dt).get_next(datetime)
 
-            scheduled_jobs.append({
-                "cron_iter": cron_iter,
-                "next_run": next_run,
-                "task": full_command,
-                "expr": cron_expr
-            })
-        except Exception as e:
-            pass  # Молча пропускаем (или раскомментировать для отладки)
-            # log_message(f"⚠️ Ошибка парсинга cron '{cron_expr}': {e}")
+
+def _compile_cron(expr):
+    fields = CRON_ALIASES.get(expr.strip().lower(), expr.lower()).split()
+    if len(fields) != 5:
+        return None
+    masks = [_parse_cron_field(field, i) for i, field in enumerate(fields)]
+    if None in masks:
+        return None
+
+    minutes, hours, days, months, weekdays = masks
+    dom_expr, dow_expr = fields[2], fields[4]
+    # Правило croniter: день месяца и день недели объединяются по ИЛИ,
+    # если ни одно из полей не "*"
+    dom_star = dom_expr == "*" or (days == (1 << 32) - 2 and "*" in dow_expr)
+    dow_star = dow_expr == "*" or (weekdays == (1 << 7) - 1 and "*" in dom_expr)
+    return CronSpec(expr, minutes, hours, days, months, weekdays, not dom_star and not dow_star)
+
+
+def compile_cron(expr):
+    """Скомпилировать cron-выражение (с кэшем); None — выражение некорректно"""
+    try:
+        return _cron_cache[expr]
+    except KeyError:
+        pass
+    spec = _compile_cron(expr)
+    if spec is None:
+        try:
+            from croniter import croniter
+
+            spec = _CroniterSpec(expr) if croniter.is_valid(expr) else None
+        except Exception:
+            spec = None
+    _cron_cache[expr] = spec
+    return spec
+
+
+def next_fire_batch(exprs, base_time):
+    """Ближайшие запуски для списка выражений; одинаковые выражения считаются один раз"""
+    results = {}
+    out = []
+    for expr in exprs:
+        try:
+            next_run = results[expr]
+        except KeyError:
+            spec = compile_cron(expr)
+            try:
+                next_run = spec.next_after(base_time) if spec else None
+            except Exception:
+                next_run = None
+            results[expr] = next_run
+        out.append(next_run)
+    return out
+
+
+# --- Часы планировщика ---
+class SystemClock:
+    """Настоящее время"""
+
+    def now(self):
+        return datetime.now()
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+
+class VirtualClock:
+    """Виртуальное время: стоит на месте, пока его не передвинут (симуляция расписания)"""
+
+    def __init__(self, start):
+        self.current = start
+        self.start = start
+
+    def now(self):
+        return self.current
+
+    def time(self):
+        return self.current.timestamp()
+
+    def monotonic(self):
+        return (self.current - self.start).total_seconds()
+
+    def advance_to(self, moment):
+        if moment > self.current:
+            self.current = moment
+
+
+clock = SystemClock()  # Источник времени для планировщика и запусков
+
+
+def task_jitter(options):
+    """Постоянный сдвиг старта задачи внутри окна jitter — по хешу её ID"""
+    try:
+        window = float(options.get("jitter", DEFAULT_JITTER))
+    except (TypeError, ValueError):
+        window = DEFAULT_JITTER
+    if window <= 0:
+        return timedelta(0)
+    fraction = zlib.crc32(options["id"].encode("utf-8")) / 2 ** 32
+    return timedelta(seconds=round(window * fraction, 3))
+
+
+def _make_job(task, next_run):
+    cron_expr, full_command, options = task
+    return {
+        "id": options["id"],
+        "spec": compile_cron(cron_expr),
+        "next_run": next_run,  # Срок по cron; в куче — срок со сдвигом jitter
+        "jitter": task_jitter(options),
+        "task": full_command,
+        "expr": cron_expr,
+        "options": options
+    }
+
+
+def setup_schedules(base_time=None):
+    """Полностью построить расписание по TASKS (при запуске); сроки считаются от base_time"""
+    global schedule_stale
+    with schedule_cond:
+        scheduled_jobs.clear()
+        schedule_heap.clear()
+        schedule_stale = 0
+        base_time = base_time or clock.now()
+        tasks = [task for task in TASKS if task_in_shard(task)] if shard else TASKS
+        next_runs = next_fire_batch([task[0] for task in tasks], base_time)
+
+        for task, next_run in zip(tasks, next_runs):
+            if next_run is None:
+                continue  # Некорректное выражение — молча пропускаем
+
+            job = _make_job(task, next_run)
+            scheduled_jobs[job["id"]] = job
+            schedule_heap.append((next_run + job["jitter"], next(schedule_seq), job))
+
+        heapq.heapify(schedule_heap)
+        mark_task_row()
+        schedule_cond.notify_all()
+
+
+def mark_task_row(tid=None):
+    """Отметить строку задачи для обновления в таблице GUI; без tid — всю таблицу"""
+    global changed_task_ids
+    with changed_task_lock:
+        if tid is None:
+            changed_task_ids = None
+        elif changed_task_ids is not None:
+            changed_task_ids.add(tid)
+
+
+def take_changed_task_rows():
+    """Забрать отметки изменившихся строк: множество ID или None — перерисовать всю таблицу"""
+    global changed_task_ids
+    with changed_task_lock:
+        changed, changed_task_ids = changed_task_ids, set()
+    return changed
+
+
+def _drop_job(tid):
+    """Убрать задание из индекса; его запись в куче станет устаревшей"""
+    global schedule_stale
+    if scheduled_jobs.pop(tid, None) is not None:
+        schedule_stale += 1
+
+
+def _compact_schedule_heap():
+    """Перестроить кучу, если устаревших записей больше половины"""
+    global schedule_stale
+    if schedule_stale > 64 and schedule_stale * 2 > len(schedule_heap):
+        schedule_heap[:] = [entry for entry in schedule_heap if scheduled_jobs.get(entry[2]["id"]) is entry[2]]
+        heapq.heapify(schedule_heap)
+        schedule_stale = 0
+
+
+def schedule_task(task, base_time=None):
+    """Добавить или обновить задание одной задачи — O(log n)
+
+    Если cron-выражение не изменилось, задание сохраняет свой next_run;
+    иначе next_run считается заново от base_time (по умолчанию — сейчас).
+    Возвращает False, если выражение некорректно (задание снимается).
+    """
+    cron_expr, full_command, options = task
+    tid = options["id"]
+    if not task_in_shard(task):
+        unschedule_task(tid)
+        return True
+    with schedule_cond:
+        job = scheduled_jobs.get(tid)
+        if job is not None and job["expr"] == cron_expr and job["jitter"] == task_jitter(options):
+            job["task"] = full_command
+            job["options"] = options
+            mark_task_row(tid)
+            return True
+
+        _drop_job(tid)
+        if job is not None and job["expr"] == cron_expr:
+            next_run = job["next_run"]  # Изменился только jitter — срок по cron тот же
+        else:
+            spec = compile_cron(cron_expr)
+            try:
+                next_run = spec.next_after(base_time or clock.now()) if spec else None
+            except Exception:
+                next_run = None
+        if next_run is not None:
+            job = _make_job(task, next_run)
+            scheduled_jobs[tid] = job
+            heapq.heappush(schedule_heap, (next_run + job["jitter"], next(schedule_seq), job))
+        _compact_schedule_heap()
+        mark_task_row(tid)
+        schedule_cond.notify_all()
+        return next_run is not None
+
+
+def unschedule_task(tid):
+    """Снять задание задачи с расписания — O(1), запись в куче удаляется лениво"""
+    with schedule_cond:
+        _drop_job(tid)
+        _compact_schedule_heap()
+        mark_task_row(tid)
+        schedule_cond.notify_all()
+
+
+def misfire_settings(options):
+    """Политика и допустимое опоздание (сек) для пропущенных запусков задачи"""
+    policy = options.get("misfire", DEFAULT_MISFIRE_POLICY)
+    if policy not in MISFIRE_POLICIES:
+        policy = DEFAULT_MISFIRE_POLICY
+    try:
+        grace = float(options.get("grace", MISFIRE_GRACE))
+    except (TypeError, ValueError):
+        grace = MISFIRE_GRACE
+    return policy, grace
+
+
+def _first_slots(spec, first, border, limit):
+    """Первые сроки от first (включительно) не позже border: (сроки, есть ли ещё)"""
+    slots = []
+    slot = first
+    while slot <= border:
+        if len(slots) >= limit:
+            return slots, True
+        slots.append(slot)
+        slot = spec.next_after(slot)
+    return slots, False
+
+
+def _last_slot(spec, first, border):
+    """Последний срок не позже border (first — срок не позже border)
+
+    Двоичный поиск по минутам через next_after: десятки вызовов даже после
+    сна длиной в год, а такт идёт под schedule_cond.
+    """
+    low, high = -1, int((border - first).total_seconds() // 60)
+    while high - low > 1:
+        middle = (low + high) // 2
+        if spec.next_after(first + timedelta(minutes=middle)) <= border:
+            low = middle
+        else:
+            high = middle
+    return first if low < 0 else spec.next_after(first + timedelta(minutes=low))
+
+
+def _missed_count(spec, first, border):
+    """Число пропущенных сроков от first до border: (число, не меньше ли оно — «N+»)"""
+    if isinstance(spec, CronSpec):
+        return spec.count_between(first - timedelta(minutes=1), border), False
+    slots, truncated = _first_slots(spec, first, border, MISFIRE_MAX_FIRES)
+    return len(slots), truncated
+
+
+def _fire_missed(job, now):
+    """Применить политику пропуска к опоздавшему заданию; возвращает следующий срок"""
+    policy, _ = misfire_settings(job["options"])
+    spec, first, jitter = job["spec"], job["next_run"], job["jitter"]
+    border = now - jitter  # Сроки не позже border уже наступили
+    count, truncated = _missed_count(spec, first, border)
+    late = (now - first - jitter).total_seconds()
+    more = "+" if truncated else ""
+
+    if policy == MISFIRE_SKIP:
+        log_message(f"⏭️ [#{job['id']}] Пропущено запусков: {count}{more} (опоздание {late:.0f} с), "
+                    f"политика skip — запуск не выполняется")
+    elif policy == MISFIRE_ALL:
+        slots, dropped = _first_slots(spec, first, border, MISFIRE_MAX_FIRES)
+        for slot in slots:
+            job_executor(job["id"], job["task"], job["options"], slot + jitter)
+        dropped = ", остальные сверх предела не выполняются" if dropped else ""
+        log_message(f"⏩ [#{job['id']}] Пропущено запусков: {count}{more} (опоздание {late:.0f} с), "
+                    f"политика all — выполняется {len(slots)}{dropped}")
+    else:
+        last = _last_slot(spec, first, border)
+        job_executor(job["id"], job["task"], job["options"], last + jitter)
+        log_message(f"⏩ [#{job['id']}] Пропущено запусков: {count}{more} (опоздание {late:.0f} с), "
+                    f"объединено в один запуск")
+    return spec.next_after(border)
+
+
+def check_clock_jump():
+    """Сравнить ход системных и монотонных часов с прошлого такта; возвращает скачок (сек)"""
+    global clock_reference
+    wall, mono = clock.time(), clock.monotonic()
+    previous, clock_reference = clock_reference, (wall, mono)
+    if previous is None:
+        return 0.0
+    jump = (wall - previous[0]) - (mono - previous[1])
+    if jump > CLOCK_JUMP_THRESHOLD:
+        log_message(f"⏰ Системные часы ушли вперёд на {jump:.0f} с (сон или перевод часов) — "
+                    f"пропущенные запуски обрабатываются по политике задач")
+    elif jump < -CLOCK_JUMP_THRESHOLD:
+        log_message(f"⏰ Системные часы переведены назад на {-jump:.0f} с — "
+                    f"уже выполненные запуски не повторяются")
+    else:
+        return 0.0
+    return jump
 
 
 def check_schedules():
-    """Проверка расписания"""
-    now = datetime.now()
-    for job in scheduled_jobs[:]:
-        if now >= job["next_run"]:
-            full_command = job["task"]
-            threading.Thread(target=run_script, args=(full_command,), daemon=True).start()
+    """Проверка расписания: запуск только наступивших задач, возвращает ближайший срок
+
+    Задание, опоздавшее больше допустимого (grace), обрабатывается по своей
+    политике пропуска: один объединённый запуск, все пропущенные или ни одного.
+    """
+    global schedule_stale
+    now = clock.now()
+    with schedule_cond:
+        while schedule_heap:
+            fire_at, _, job = schedule_heap[0]  # Срок по cron со сдвигом jitter
+            if scheduled_jobs.get(job["id"]) is not job:
+                heapq.heappop(schedule_heap)  # Задание удалено или заменено
+                schedule_stale -= 1
+                continue
+            if fire_at > now:
+                break
 
+            heapq.heappop(schedule_heap)
             try:
-                job["next_run"] = job["cron_iter"].get_next(datetime)
+                _, grace = misfire_settings(job["options"])
+                if (now - fire_at).total_seconds() > grace:
+                    job["next_run"] = _fire_missed(job, now)
+                else:
+                    job_executor(job["id"], job["task"], job["options"], fire_at)
+                    job["next_run"] = job["spec"].next_after(job["next_run"])
+                if job["next_run"] is None:
+                    raise ValueError("нет следующего срока")
+                heapq.heappush(schedule_heap, (job["next_run"] + job["jitter"], next(schedule_seq), job))
             except Exception as e:
-                log_message(f"⚠️ Ошибка пересчёта cron: {e}")
-                scheduled_jobs.remove(job)
+                log_message(f"⚠️ [#{job['id']}] Ошибка пересчёта cron: {e}")
+                del scheduled_jobs[job["id"]]
+            mark_task_row(job["id"])
 
+        return schedule_heap[0][0] if schedule_heap else None
 
-def update_gui():
-    """Обновить интерфейс: умное обновление лога, стабильная прокрутка"""
-    global task_widgets, sort_key, sort_reverse, sort_reset_btn, last_log_hash
-
-    tasks_frame.columnconfigure(0, weight=0)
-    tasks_frame.columnconfigure(1, weight=1)
-    tasks_frame.columnconfigure(2, weight=0)
-    tasks_frame.columnconfigure(3, weight=0)
-
-    job_map = {job["expr"]: job["next_run"] for job in scheduled_jobs}
-
-    display_data = []
-    for i, (cron, cmd) in enumerate(TASKS):
-        next_run = job_map.get(cron, None)
-        next_str = next_run.strftime("%H:%M %d.%m") if next_run else "—"
-        display_data.append({
-            "index": i,
-            "cron": cron,
-            "command": cmd,
-            "next_run": next_run,
-            "next_str": next_str
-        })
-
-    if sort_key:
-        if sort_key == "next_run":
-            display_data.sort(
-                key=lambda x: x["next_run"] or datetime.max,
-                reverse=sort_reverse
-            )
-        else:
-            display_data.sort(
-                key=lambda x: x[sort_key],
-                reverse=sort_reverse
-            )
 
-    for i, data in enumerate(display_data):
-        row = i + 3
-        bg = "#f0f0f0" if i % 2 == 0 else "white"
+def wake_scheduler():
+    """Разбудить планировщик (изменение задач или остановка)"""
+    with schedule_cond:
+        schedule_cond.notify_all()
 
-        if i < len(task_widgets):
-            cron_lbl, cmd_lbl, next_lbl, btn_frame = task_widgets[i]
-            cron_lbl.config(text=data["cron"], bg=bg)
-            cmd_lbl.config(text=data["command"], bg=bg)
-            next_lbl.config(text=data["next_str"], bg=bg)
-            btn_frame.config(bg=bg)
-        else:
-            cron_lbl = tk.Label(tasks_frame, text=data["cron"], width=20, anchor="w", font=("Courier", 9), height=1, bg=bg)
-            cron_lbl.grid(row=row, column=0, padx=5, pady=1, sticky="w")
 
-            cmd_lbl = tk.Label(tasks_frame, text=data["command"], anchor="w", font=("Courier", 9), fg="blue", height=1, bg=bg)
-            cmd_lbl.grid(row=row, column=1, padx=5, pady=1, sticky="ew")
+def scheduler_worker():
+    """Фоновый поток: спит до ближайшего срока или до изменения набора задач"""
+    setup_schedules()
+    with schedule_cond:
+        while not stop_event.is_set():
+            if not supervisor_alive():
+                log_message("🛑 Управляющий процесс завершился, шард останавливается")
+                stop_event.set()
+                break
+            if not hold_lease():
+                schedule_cond.wait(LEASE_POLL_INTERVAL)
+                continue
+            check_clock_jump()
+            tick_start = time.perf_counter()
+            next_deadline = check_schedules()
+            metrics.record_tick(time.perf_counter() - tick_start)
+            timeout = SCHEDULER_MAX_SLEEP
+            if next_deadline is not None:
+                delay = (next_deadline - clock.now()).total_seconds()
+                timeout = min(max(delay, 0), SCHEDULER_MAX_SLEEP)
+            schedule_cond.wait(timeout)
+
+
+def replay_schedule(start, end, on_fire=None):
+    """Прогнать расписание TASKS в виртуальном времени от start до end без запуска команд
+
+    Планировщик перескакивает от срока к сроку; вместо пула вызывается
+    on_fire(время, id) (по умолчанию запуски только собираются).
+    Возвращает список [(плановое время, id), ...] в порядке срабатывания.
+    Текущее расписание в памяти при этом перестраивается.
+    """
+    global clock, job_executor
+    fires = []
+    record = on_fire or (lambda moment, tid: fires.append((moment, tid)))
+
+    def stub_executor(tid, full_command, options, scheduled=None):
+        record(scheduled or clock.now(), tid)
+
+    saved = clock, job_executor
+    clock, job_executor = VirtualClock(start), stub_executor
+    try:
+        setup_schedules()
+        while True:
+            deadline = check_schedules()
+            if deadline is None or deadline > end:
+                break
+            clock.advance_to(deadline)
+    finally:
+        clock, job_executor = saved
+    return fires
 
-            next_lbl = tk.Label(tasks_frame, text=data["next_str"], width=18, anchor="w", font=("Courier", 9), height=1, bg=bg)
-            next_lbl.grid(row=row, column=2, padx=5, pady=1, sticky="w")
 
-            btn_frame = tk.Frame(tasks_frame, bg=bg)
-            btn_frame.grid(row=row, column=3, padx=5, pady=1, sticky="e")
+# --- Ведущий экземпляр и шарды ---
+def _lock_file(f):
+    """Неблокирующая исключительная блокировка файла; OSError — файл занят"""
+    if os.name == "nt":
+        import msvcrt
 
-            # --- Кнопки с иконками ---
-            run_btn = tk.Button(
-                btn_frame, text="▶", width=3, height=1,
-                command=lambda idx=data["index"]: execute_task_by_index(idx),
-                bg="lightblue"
-            )
-            run_btn.pack(side=tk.LEFT, padx=1)
-            Tooltip(run_btn, "Выполнить задачу")
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    else:
+        import fcntl
 
-            copy_btn = tk.Button(
-                btn_frame, text="➕", width=3, height=1,
-                command=lambda idx=data["index"]: copy_task_by_index(idx),
-                bg="lightgreen", font=("Arial", 9)
-            )
-            copy_btn.pack(side=tk.LEFT, padx=1)
-            Tooltip(copy_btn, "Копировать задачу")
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
 
-            delete_btn = tk.Button(
-                btn_frame, text="✖", width=3, height=1,
-                command=lambda idx=data["index"]: delete_task_by_index(idx),
-                bg="red", fg="white", font=("Arial", 9)
-            )
-            delete_btn.pack(side=tk.LEFT, padx=1)
-            Tooltip(delete_btn, "Удалить задачу")
 
-            task_widgets.append([cron_lbl, cmd_lbl, next_lbl, btn_frame])
+class LeaderLease:
+    """Аренда ведущего через блокировку файла
 
-    while len(task_widgets) > len(display_data):
-        widgets = task_widgets.pop()
-        for w in widgets:
-            w.grid_forget()
-            w.destroy()
+    Блокировку держит открытый файл, поэтому ОС снимает её сама, если
+    процесс ведущего завершился или упал. В файл пишется PID ведущего.
+    """
 
-    # --- Умное обновление лога ---
-    current_log_hash = hash(tuple(log_messages[-500:]))
+    def __init__(self, path):
+        self.path = path
+        self.held = False
+        self._file = None
 
-    if current_log_hash != last_log_hash:
+    def try_acquire(self):
+        if self.held:
+            return True
+        f = open(self.path, "a+", encoding="utf-8")
+        try:
+            _lock_file(f)
+        except OSError:
+            f.close()
+            return False
+        f.seek(0)
+        f.truncate()
+        f.write(f"{os.getpid()}\n")
+        f.flush()
+        self._file = f
+        self.held = True
+        return True
+
+    def holder(self):
+        """PID ведущего из файла аренды (или None)"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return int(f.read().strip() or 0) or None
+        except (OSError, ValueError):
+            return None
+
+    def release(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        self.held = False
+
+
+def hold_lease():
+    """Держит ли экземпляр аренду ведущего; резервный пытается её захватить
+
+    Став ведущим, резервный экземпляр строит расписание от момента, когда
+    прежний ведущий ещё был жив, — сроки, пришедшиеся на передачу, не теряются.
+    """
+    global lease_standby_since
+    if lease is None or lease.held:
+        return True
+    seen = clock.now()
+    if not lease.try_acquire():
+        if lease_standby_since is None:
+            log_message(f"⏸️ Резервный экземпляр: ведущий — PID {lease.holder() or '?'} ({lease.path})")
+        lease_standby_since = seen
+        return False
+    log_message(f"👑 Экземпляр стал ведущим ({lease.path})")
+    if lease_standby_since is not None:
+        setup_schedules(base_time=lease_standby_since)
+        lease_standby_since = None
+    return True
+
+
+def supervisor_alive():
+    """Жив ли управляющий процесс шарда (у осиротевшего шарда меняется родитель)
+
+    Аренду ведущего держит только управляющий: если он упал, её займёт
+    резервный экземпляр, и шард-сирота выполнял бы задачи вторым.
+    """
+    return shard_parent is None or os.getppid() == shard_parent
+
+
+def watch_supervisor():
+    """Фоновый поток шарда: разбудить планировщик, когда управляющий процесс умер"""
+    while not stop_event.wait(LEASE_POLL_INTERVAL):
+        if not supervisor_alive():
+            wake_scheduler()
+            return
+
+
+def task_in_shard(task):
+    """Относится ли задача к шарду этого процесса (стабильный хеш ID)"""
+    if shard is None:
+        return True
+    index, count = shard
+    return zlib.crc32(task_id(task).encode("utf-8")) % count == index
+
+
+def _shard_child_argv(argv):
+    """Аргументы управляющего процесса без --shards"""
+    result = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg in ("--shards", "--standby-since"):
+            skip = True
+        elif not arg.startswith(("--shards=", "--standby-since=")):
+            result.append(arg)
+    return result
+
+
+def run_shards(count, argv):
+    """Управляющий процесс: count дочерних планировщиков, каждый со своей долей задач
+
+    Управляющий выдаёт ID новым задачам в файле и перезапускает упавшие шарды.
+    Шарды запускаются, только пока управляющий держит аренду ведущего: рядом
+    с другим ведущим экземпляром он ждёт в резерве без шардов.
+    """
+    global lease_standby_since
+    import signal
+
+    setup_logger()
+    load_tasks()
+    start_tasks_watcher()
+    start_log_archiver()
+
+    command = [sys.executable, os.path.abspath(__file__)] + _shard_child_argv(argv)
+    procs = {}
+    started = {}
+
+    def spawn(index, since=None):
+        # Сроки от since: шард выполнит то, что пришлось на передачу аренды
+        extra = ["--standby-since", str(since.timestamp())] if since else []
+        procs[index] = subprocess.Popen(command + ["--headless", "--shard", f"{index}/{count}"] + extra)
+        started[index] = time.monotonic()
+        log_message(f"🧩 Шард {index}/{count} запущен, PID {procs[index].pid}")
+
+    def on_signal(signum, frame):
+        log_message(f"🛑 Получен сигнал {signum}, остановка шардов")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+
+    while lease is not None and not lease.try_acquire():
+        if lease_standby_since is None:
+            log_message(f"⏸️ Резервный экземпляр: ведущий — PID {lease.holder() or '?'} ({lease.path})")
+            lease_standby_since = clock.now()
+        if stop_event.wait(LEASE_POLL_INTERVAL):
+            return
+    if lease is not None:
+        log_message(f"👑 Экземпляр стал ведущим ({lease.path})")
+
+    for index in range(count):
+        spawn(index, lease_standby_since)
+    while not stop_event.wait(1):
+        for index, proc in procs.items():
+            if proc.poll() is not None and time.monotonic() - started[index] >= SHARD_RESTART_DELAY:
+                log_message(f"💥 Шард {index}/{count} завершился с кодом {proc.returncode}, перезапуск")
+                spawn(index)
+
+    for proc in procs.values():
+        if proc.poll() is None:
+            proc.terminate()
+    for proc in procs.values():
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def task_row(task):
+    """Данные строки таблицы для задачи: текст колонок и ключи сортировки"""
+    cron, cmd, options = task
+    job = scheduled_jobs.get(options["id"])
+    next_run = job["next_run"] + job["jitter"] if job else None
+    last_duration, runs, ok = run_summary.get(options["id"], (None, 0, 0))
+    return {
+        "cron": cron,
+        "command": cmd,
+        "next_run": next_run,
+        "next_str": next_run.strftime("%H:%M %d.%m") if next_run else "—",
+        "duration": last_duration if last_duration is not None else -1,
+        "duration_str": f"{last_duration:.2f} с" if last_duration is not None else "—",
+        "success": ok / runs if runs else -1,
+        "success_str": f"{100 * ok / runs:.0f}% из {runs}" if runs else "—"
+    }
+
+
+def refresh_task_table(changed=None):
+    """Обновить таблицу задач: пересчитываются строки только из changed (None — все)
+
+    Новые и удалённые задачи перерисовывают таблицу целиком. При сортировке
+    порядок строится заново по уже посчитанным строкам, а в Treeview
+    трогаются только строки с изменившимися значениями или позицией.
+    """
+    global task_order
+    if changed is not None and all(tid in tasks_by_id and tid in task_row_data for tid in changed):
+        for tid in changed:
+            task_row_data[tid] = task_row(tasks_by_id[tid])
+        order = task_order
+    else:
+        changed = None
+        task_row_data.clear()
+        for task in TASKS:
+            task_row_data[task_id(task)] = task_row(task)
+        order = [task_id(task) for task in TASKS]
+
+    if sort_key == "next_run":
+        order = sorted(order, key=lambda iid: task_row_data[iid]["next_run"] or datetime.max, reverse=sort_reverse)
+    elif sort_key:
+        order = sorted(order, key=lambda iid: task_row_data[iid][sort_key], reverse=sort_reverse)
+
+    if changed is None or order != task_order:
+        updates = [(iid, "even" if pos % 2 == 0 else "odd") for pos, iid in enumerate(order)]
+    else:
+        updates = [(iid, task_rows[iid][1]) for iid in changed]  # Позиции прежние — полоса строки тоже
+
+    for iid, tag in updates:
+        data = task_row_data[iid]
+        values = (data["cron"], data["command"], data["next_str"], data["duration_str"], data["success_str"])
+        shown = task_rows.get(iid)
+        if shown is None:
+            task_tree.insert("", tk.END, iid=iid, values=values, tags=(tag,))
+        elif shown != (values, tag):
+            task_tree.item(iid, values=values, tags=(tag,))
+        task_rows[iid] = (values, tag)
+
+    if changed is not None and order == task_order:
+        return
+
+    wanted = set(order)
+    removed = [iid for iid in task_rows if iid not in wanted]
+    if removed:
+        task_tree.delete(*removed)
+        for iid in removed:
+            del task_rows[iid]
+
+    if list(task_tree.get_children()) != order:
+        task_tree.set_children("", *order)
+    task_order = order
+
+    for column, title in TASK_COLUMNS.items():
+        arrow = (" ▼" if sort_reverse else " ▲") if column == sort_key else ""
+        task_tree.heading(column, text=title + arrow)
+
+
+def update_gui():
+    """Обновить интерфейс: в таблице — только изменившиеся задачи, в логе — только новые строки"""
+    global sort_key, sort_reverse, sort_reset_btn, log_shown_seq
+
+    changed = take_changed_task_rows()
+    if changed is None or changed:
+        refresh_task_table(changed)
+
+    # --- Инкрементальное обновление лога: только новые строки ---
+    new_messages, last_seq, lost = get_new_log_messages(log_shown_seq)
+
+    if new_messages:
         log_text.config(state='normal')
 
         prev_view = log_text.yview()
         was_at_bottom = prev_view[1] >= 0.99
         current_pos = prev_view[0]
 
-        log_text.delete(1.0, tk.END)
-        for msg in log_messages[-500:]:
-            log_text.insert(tk.END, msg + "\n")
+        if lost or len(new_messages) >= LOG_VIEW_LINES:
+            log_text.delete(1.0, tk.END)
+            new_messages = new_messages[-LOG_VIEW_LINES:]
+
+        log_text.insert(tk.END, "".join(msg + "\n" for msg in new_messages))
+
+        # Последняя строка виджета всегда пустая (после завершающего \n)
+        excess = int(log_text.index("end-1c").split(".")[0]) - 1 - LOG_VIEW_LINES
+        if excess > 0:
+            log_text.delete(1.0, f"{excess + 1}.0")
 
         if was_at_bottom:
             log_text.see(tk.END)
@@ -404,11 +3370,21 @@ def update_gui():
 
         log_text.config(state='disabled')
 
-        last_log_hash = current_log_hash
+    log_shown_seq = last_seq
 
     if sort_reset_btn:
         sort_reset_btn.config(state='normal' if sort_key else 'disabled')
 
+    if status_label:
+        stats = execution_pool.stats()
+        state = "⏸️ Резерв" if lease is not None and not lease.held else "🟢 Работает"
+        status_label.config(
+            text=f"{state} | Выполняется: {stats['running']}/{stats['max_workers']}"
+                 f" | Очередь: {stats['queue_depth']} (макс {stats['max_queue_depth']})"
+                 f" | Ожидание: ср {stats['wait_avg']:.1f} с, макс {stats['wait_max']:.1f} с"
+                 f" | Пропущено: {stats['skipped']}"
+        )
+
 
 def browse_file():
     """Выбрать скрипт, сохранив аргументы"""
@@ -458,7 +3434,7 @@ def add_task():
 
         cron_expr = f"{m} {h} {dom} {mon} {dow}"
 
-        if not croniter.is_valid(cron_expr):
+        if compile_cron(cron_expr) is None:
             messagebox.showerror("Ошибка", f"Неверное cron-выражение: {cron_expr}")
             return
 
@@ -467,25 +3443,16 @@ def add_task():
             messagebox.showwarning("Предупреждение", "Введите команду")
             return
 
-        for existing_cron, existing_cmd in TASKS:
-            if existing_cron == cron_expr and existing_cmd == full_command:
-                messagebox.showwarning(
-                    "Дубликат",
-                    "Такая задача уже существует:\n"
-                    f"Время: {cron_expr}\n"
-                    f"Команда: {full_command}"
-                )
-                return
-
-        TASKS.append((cron_expr, full_command))
-
-        # ✅ Сохраняем и синхронизируем эталон
-        save_tasks()
-        original_tasks_order[:] = TASKS.copy()
+        if find_duplicate_task(cron_expr, full_command):
+            messagebox.showwarning(
+                "Дубликат",
+                "Такая задача уже существует:\n"
+                f"Время: {cron_expr}\n"
+                f"Команда: {full_command}"
+            )
+            return
 
-        setup_schedules()
-        # ✅ Логируем задачи один раз при добавлении
-        log_message(f"📌 Добавлена задача: {cron_expr} → {full_command}")
+        insert_task(cron_expr, full_command)
         root.after(0, update_gui)
 
         messagebox.showinfo("Готово", "Задача добавлена и сохранена")
@@ -495,12 +3462,13 @@ def add_task():
         messagebox.showerror("Ошибка", f"Не удалось добавить задачу: {e}")
 
 
-def copy_task_by_index(index):
-    """Копировать задачу по индексу в TASKS"""
-    if index < 0 or index >= len(TASKS):
+def copy_task_by_id(tid):
+    """Копировать задачу в форму по ID"""
+    task = find_task(tid)
+    if task is None:
         return
 
-    cron_expr, full_command = TASKS[index]
+    cron_expr, full_command, _ = task
     parts = cron_expr.split()
     if len(parts) == 5:
         m, h, dom, mon, dow = parts
@@ -514,35 +3482,30 @@ def copy_task_by_index(index):
     command_entry.insert(0, full_command)
 
 
-def delete_task_by_index(index):
-    """Удалить задачу по индексу в TASKS"""
-    if index < 0 or index >= len(TASKS):
+def delete_task_by_id(tid):
+    """Удалить задачу по ID"""
+    task = find_task(tid)
+    if task is None:
         return
 
-    cron_expr, full_command = TASKS[index]
+    cron_expr, full_command, _ = task
     if not messagebox.askyesno("Подтверждение", f"Удалить задачу?\n{cron_expr}\n→ {full_command}"):
         return
 
-    del TASKS[index]
-
-    # ✅ Сохраняем и синхронизируем эталон
-    save_tasks()
-    original_tasks_order[:] = TASKS.copy()
-
-    setup_schedules()
+    remove_task(tid)
     root.after(0, update_gui)
-    log_message(f"🗑️ Удалена задача: {cron_expr} → {full_command}")
 
 
-def execute_task_by_index(index):
-    if index < 0 or index >= len(TASKS): return
-    _, full_command = TASKS[index]
+def execute_task_by_id(tid):
+    task = find_task(tid)
+    if task is None: return
+    _, full_command, options = task
     if messagebox.askyesno("Подтвердите запуск", f"Выполнить команду?\n\n{full_command}"):
-        threading.Thread(target=run_script, args=(full_command,), daemon=True).start()
+        submit_run(tid, full_command, options)
 
 
 def sort_by(key):
-    """Сортировка по ключу — изменяет порядок в TASKS только в памяти"""
+    """Сортировка по ключу — меняет только порядок строк в таблице, не TASKS и не расписание"""
     global sort_key, sort_reverse
     if sort_key == key:
         sort_reverse = not sort_reverse
@@ -550,52 +3513,152 @@ def sort_by(key):
         sort_key = key
         sort_reverse = False
 
-    job_map = {job["expr"]: job["next_run"] for job in scheduled_jobs}
-
-    temp_data = []
-    for cron, cmd in TASKS:
-        next_run = job_map.get(cron, None)
-        temp_data.append({
-            "cron": cron,
-            "command": cmd,
-            "next_run": next_run
-        })
-
-    if sort_key == "next_run":
-        temp_data.sort(key=lambda x: x["next_run"] or datetime.max, reverse=sort_reverse)
-    else:
-        temp_data.sort(key=lambda x: x[sort_key], reverse=sort_reverse)
-
-    TASKS[:] = [(item["cron"], item["command"]) for item in temp_data]
-    setup_schedules()
+    mark_task_row()
     root.after(0, update_gui)
 
 
 def reset_sort():
-    """Сбросить сортировку — вернуть последний сохранённый порядок"""
+    """Сбросить сортировку — вернуть порядок из файла задач"""
     global sort_key, sort_reverse
     sort_key = None
     sort_reverse = False
 
-    TASKS[:] = original_tasks_order.copy()
-    setup_schedules()
+    mark_task_row()
     root.after(0, update_gui)
 
 
-def create_headers():
-    """Создать заголовки с сортировкой"""
-    tk.Label(tasks_frame, text="Cron", width=20, anchor="w", font=("Courier", 9, "bold"), bg="lightgray").grid(
-        row=0, column=0, padx=5, pady=1, sticky="w")
-    tk.Label(tasks_frame, text="Команда", anchor="w", font=("Courier", 9, "bold"), bg="lightgray").grid(
-        row=0, column=1, padx=5, pady=1, sticky="ew")
-    tk.Label(tasks_frame, text="Ближайшее выполнение", width=18, anchor="w", font=("Courier", 9, "bold"), bg="lightgray").grid(
-        row=0, column=2, padx=5, pady=1, sticky="w")
-    tk.Label(tasks_frame, text="Действия", anchor="e", width=14, font=("Courier", 9, "bold"), bg="lightgray").grid(
-        row=0, column=3, padx=5, pady=1, sticky="e")
+def create_task_table(parent):
+    """Создать таблицу задач (ttk.Treeview) с сортировкой по заголовкам и контекстным меню"""
+    global task_tree
 
-    tasks_frame.grid_slaves(row=0, column=0)[0].bind("<Button-1>", lambda e: sort_by("cron"))
-    tasks_frame.grid_slaves(row=0, column=1)[0].bind("<Button-1>", lambda e: sort_by("command"))
-    tasks_frame.grid_slaves(row=0, column=2)[0].bind("<Button-1>", lambda e: sort_by("next_run"))
+    style = ttk.Style()
+    style.configure("Tasks.Treeview", font=("Courier", 9), rowheight=20)
+    style.configure("Tasks.Treeview.Heading", font=("Courier", 9, "bold"))
+
+    task_tree = ttk.Treeview(
+        parent,
+        columns=tuple(TASK_COLUMNS),
+        show="headings",
+        selectmode="browse",
+        style="Tasks.Treeview",
+        height=8
+    )
+    for column, title in TASK_COLUMNS.items():
+        task_tree.heading(column, text=title, anchor="w", command=lambda c=column: sort_by(c))
+    task_tree.column("cron", width=160, minwidth=100, stretch=False, anchor="w")
+    task_tree.column("command", width=600, minwidth=200, stretch=True, anchor="w")
+    task_tree.column("next_run", width=170, minwidth=120, stretch=False, anchor="w")
+    task_tree.column("duration", width=110, minwidth=80, stretch=False, anchor="e")
+    task_tree.column("success", width=120, minwidth=80, stretch=False, anchor="e")
+    task_tree.tag_configure("even", background="#f0f0f0")
+    task_tree.tag_configure("odd", background="white")
+
+    scrollbar = ttk.Scrollbar(parent, orient="vertical", command=task_tree.yview)
+    task_tree.configure(yscrollcommand=scrollbar.set)
+    scrollbar.pack(side=tk.RIGHT, fill="y")
+    task_tree.pack(side=tk.LEFT, fill="both", expand=True)
+
+    menu = tk.Menu(task_tree, tearoff=0)
+    menu.add_command(label="▶ Выполнить задачу", command=lambda: run_selected_task(execute_task_by_id))
+    menu.add_command(label="➕ Копировать задачу", command=lambda: run_selected_task(copy_task_by_id))
+    menu.add_separator()
+    menu.add_command(label="✖ Удалить задачу", command=lambda: run_selected_task(delete_task_by_id))
+
+    def show_menu(event):
+        iid = task_tree.identify_row(event.y)
+        if not iid:
+            return
+        task_tree.selection_set(iid)
+        task_tree.focus(iid)
+        try:
+            menu.tk_popup(event.x_root, event.y_root)
+        finally:
+            menu.grab_release()
+
+    task_tree.bind("<Button-3>", show_menu)
+    task_tree.bind("<Double-1>", lambda e: run_selected_task(copy_task_by_id))
+    task_tree.bind("<Delete>", lambda e: run_selected_task(delete_task_by_id))
+    task_tree.bind("<Return>", lambda e: run_selected_task(execute_task_by_id))
+
+
+def run_selected_task(action):
+    """Выполнить действие (запуск/копирование/удаление) над выделенной строкой таблицы"""
+    selection = task_tree.selection()
+    if not selection:
+        messagebox.showinfo("Задача не выбрана", "Выберите задачу в списке")
+        return
+    action(selection[0])
+
+
+def search_logs_gui():
+    """Найти запуски в логах по полям поиска; поиск — в фоновом потоке, окно результатов — в потоке GUI
+
+    Первый поиск дочитывает в индекс все логи и архивы, и flush_logger может
+    ждать до 5 с — в потоке GUI это заморозило бы окно.
+    """
+    tid = search_id_var.get().strip()
+    if not tid and task_tree.selection():
+        tid = task_tree.selection()[0]
+    query = (tid or None, search_since_var.get(), search_until_var.get(), search_failed_var.get())
+    search_btn.config(state='disabled')
+    root.config(cursor="watch")
+
+    def worker():
+        try:
+            runs = search_run_logs(*query)
+        except Exception as e:
+            root.after(0, lambda error=e: finish(None, error))
+        else:
+            root.after(0, lambda: finish(runs, None))
+
+    def finish(runs, error):
+        search_btn.config(state='normal')
+        root.config(cursor="")
+        if error is not None:
+            messagebox.showerror("Поиск по логам", str(error))
+        else:
+            show_search_results(tid, runs)
+
+    threading.Thread(target=worker, daemon=True, name="log-search").start()
+
+
+def show_search_results(tid, runs):
+    """Окно с найденными запусками; текст блока читается из лога при выборе строки"""
+    window = tk.Toplevel(root)
+    window.title(f"Запуски {'#' + tid if tid else 'всех задач'} — найдено {len(runs)}")
+    window.geometry("900x600")
+
+    columns = ("started", "id", "outcome", "code")
+    tree = ttk.Treeview(window, columns=columns, show="headings", height=12)
+    for column, title, width in zip(columns, ("Начало", "ID", "Исход", "Код"), (160, 100, 100, 60)):
+        tree.heading(column, text=title)
+        tree.column(column, width=width, anchor="w")
+    tree.pack(fill="x", padx=5, pady=5)
+
+    block_text = scrolledtext.ScrolledText(window, wrap=tk.WORD, font=("Courier", 9), state='disabled', bg="#f9f9f9")
+    block_text.pack(fill="both", expand=True, padx=5, pady=(0, 5))
+
+    locations = {}
+    for name, offset, started_at, run_tid, outcome, exit_code in runs:
+        moment = datetime.fromtimestamp(started_at).strftime("%Y-%m-%d %H:%M:%S") if started_at else "—"
+        item = tree.insert("", tk.END, values=(moment, run_tid, outcome, "" if exit_code is None else exit_code))
+        locations[item] = (name, offset)
+
+    def show_block(event=None):
+        selection = tree.selection()
+        if not selection:
+            return
+        lines = read_run_block(*locations[selection[0]])
+        block_text.config(state='normal')
+        block_text.delete("1.0", tk.END)
+        block_text.insert(tk.END, "\n".join(lines))
+        block_text.config(state='disabled')
+
+    tree.bind("<<TreeviewSelect>>", show_block)
+    if runs:
+        last = tree.get_children()[-1]
+        tree.selection_set(last)
+        tree.see(last)
 
 
 def clear_form():
@@ -759,10 +3822,46 @@ def bind_shortcuts(entry):
     entry.bind("<Button-1>", lambda e: entry.focus())
 
 
+def load_gui_modules():
+    """Импортировать tkinter и Pillow — только для GUI-режима"""
+    global tk, ttk, scrolledtext, messagebox, filedialog, Image, ImageTk
+    import tkinter as tk
+    from tkinter import ttk, scrolledtext, messagebox, filedialog
+    from PIL import Image, ImageTk  # pip install pillow
+
+
+def run_headless():
+    """Режим службы: тот же планировщик без GUI, остановка по SIGTERM/SIGINT"""
+    import signal
+
+    setup_logger()
+    load_tasks()
+
+    def on_signal(signum, frame):
+        log_message(f"🛑 Получен сигнал {signum}, остановка")
+        stop_event.set()
+        wake_scheduler()
+
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+
+    for task in TASKS:
+        if task_in_shard(task):
+            log_message(f"📌 [#{task_id(task)}] Задача запланирована: {task[0]} → {task[1]}")
+
+    start_tasks_watcher()
+    start_log_archiver()
+    if shard_parent is not None:
+        threading.Thread(target=watch_supervisor, daemon=True, name="supervisor-watch").start()
+    scheduler_worker()
+
+
 def main():
     global root, log_text, sort_reset_btn
     global minute_var, hour_var, day_var, month_var, weekday_var, command_entry, tasks_frame
+    global search_id_var, search_since_var, search_until_var, search_failed_var, search_btn
 
+    load_gui_modules()
     setup_logger()
     load_tasks()
 
@@ -782,6 +3881,7 @@ def main():
 
     def on_closing():
         stop_event.set()
+        wake_scheduler()
         root.destroy()
 
     root.protocol("WM_DELETE_WINDOW", on_closing)
@@ -883,14 +3983,50 @@ def main():
     )
     sort_reset_btn.pack(side=tk.LEFT)
 
+    # --- Действия над выделенной задачей ---
+    for text, action, tooltip, bg, fg in (
+        ("▶", execute_task_by_id, "Выполнить задачу", "lightblue", "black"),
+        ("➕", copy_task_by_id, "Копировать задачу", "lightgreen", "black"),
+        ("✖", delete_task_by_id, "Удалить задачу", "red", "white"),
+    ):
+        action_btn = tk.Button(
+            sort_control_frame, text=text, width=3, height=1,
+            command=lambda a=action: run_selected_task(a),
+            bg=bg, fg=fg, font=("Arial", 9)
+        )
+        action_btn.pack(side=tk.LEFT, padx=(5 if text == "▶" else 1, 1))
+        Tooltip(action_btn, tooltip)
+
     global tasks_frame
     tasks_frame = tk.Frame(main_container)
     tasks_frame.pack(fill="both", expand=True)
 
-    create_headers()
-    ttk.Separator(tasks_frame, orient="horizontal").grid(row=1, column=0, columnspan=4, sticky="ew", pady=1)
-
-    tk.Label(main_container, text="Лог выполнения", font=("Arial", 11, "bold")).pack(pady=(5, 2), anchor="w")
+    create_task_table(tasks_frame)
+
+    log_header_frame = tk.Frame(main_container)
+    log_header_frame.pack(pady=(5, 2), fill="x")
+    tk.Label(log_header_frame, text="Лог выполнения", font=("Arial", 11, "bold")).pack(side=tk.LEFT)
+
+    # --- Поиск запусков в логах и архивах ---
+    search_id_var = tk.StringVar()
+    search_since_var = tk.StringVar()
+    search_until_var = tk.StringVar()
+    search_failed_var = tk.BooleanVar()
+    search_btn = tk.Button(log_header_frame, text="🔍 Найти", command=search_logs_gui, font=("Arial", 9))
+    search_btn.pack(side=tk.RIGHT, padx=(5, 0))
+    Tooltip(search_btn, "Найти запуски в логах (без ID — выделенной задачи или всех)")
+    tk.Checkbutton(log_header_frame, text="только ошибки", variable=search_failed_var).pack(side=tk.RIGHT)
+    for label, var, width, tooltip in (
+        ("по", search_until_var, 16, "ГГГГ-ММ-ДД [ЧЧ:ММ], день включительно"),
+        ("с", search_since_var, 16, "ГГГГ-ММ-ДД [ЧЧ:ММ]"),
+        ("ID", search_id_var, 10, "ID задачи"),
+    ):
+        entry = tk.Entry(log_header_frame, textvariable=var, width=width)
+        entry.pack(side=tk.RIGHT, padx=(2, 5))
+        entry.bind("<Return>", lambda e: search_logs_gui())
+        bind_shortcuts(entry)
+        Tooltip(entry, tooltip)
+        tk.Label(log_header_frame, text=label).pack(side=tk.RIGHT)
     global log_text
     log_text = scrolledtext.ScrolledText(
         main_container,
@@ -909,7 +4045,8 @@ def main():
     status_frame.pack(side="bottom", fill="x")
     status_frame.pack_propagate(False)
 
-    status = tk.Label(
+    global status_label
+    status_label = status = tk.Label(
         status_frame,
         text="🟢 Работает",
         bd=1,
@@ -922,26 +4059,207 @@ def main():
     status.pack(fill="x", expand=True)
 
     # --- Фоновый поток ---
-    def scheduler_worker():
-        setup_schedules()
-        while not stop_event.is_set():
-            check_schedules()
-            time.sleep(1)
-            try:
-                root.after(0, update_gui)
-            except:
-                break
-
     thread = threading.Thread(target=scheduler_worker, daemon=True)
     thread.start()
 
+    # Изменения файла задач применяются в потоке Tk
+    start_tasks_watcher(lambda: root.after(0, reload_tasks_file))
+    start_log_archiver()
+
     # ✅ Логируем задачи один раз при старте
-    for cron, cmd in TASKS:
-        log_message(f"📌 Задача запланирована: {cron} → {cmd}")
+    for cron, cmd, options in TASKS:
+        log_message(f"📌 [#{options['id']}] Задача запланирована: {cron} → {cmd}")
+
+    # --- Периодическое обновление GUI (в потоке Tk) ---
+    def refresh_gui():
+        if stop_event.is_set():
+            return
+        update_gui()
+        root.after(GUI_REFRESH_MS, refresh_gui)
 
-    update_gui()
+    refresh_gui()
     root.mainloop()
 
 
+def parse_args(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Планировщик задач")
+    parser.add_argument("--headless", action="store_true",
+                        help="работать как служба, без GUI (tkinter и Pillow не загружаются)")
+    parser.add_argument("--tasks", default=TASKS_FILE, help=f"файл задач (по умолчанию {TASKS_FILE})")
+    parser.add_argument("--db", metavar="PATH",
+                        help="хранить задачи в SQLite; новая база заполняется из файла --tasks")
+    parser.add_argument("--import-json", metavar="FILE", help="заменить задачи содержимым JSON-файла и выйти")
+    parser.add_argument("--export-json", metavar="FILE", help="выгрузить задачи в JSON-файл и выйти")
+    parser.add_argument("--list", action="store_true", help="вывести список задач и выйти")
+    parser.add_argument("--add", nargs=2, metavar=("CRON", "COMMAND"), help="добавить задачу и выйти")
+    parser.add_argument("--delete", metavar="ID", help="удалить задачу по ID и выйти")
+    parser.add_argument("--history", default=HISTORY_FILE, metavar="PATH",
+                        help=f"база истории запусков (по умолчанию {HISTORY_FILE})")
+    parser.add_argument("--no-history", action="store_true", help="не записывать историю запусков")
+    parser.add_argument("--stats", nargs="?", const=0, type=float, metavar="DAYS",
+                        help="вывести статистику запусков (за последние DAYS дней) и выйти")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help=f"отдавать метрики Prometheus на http://{METRICS_HOST}:PORT/metrics")
+    parser.add_argument("--metrics-csv", metavar="FILE", help="дописывать метрики каждого запуска в CSV-файл")
+    parser.add_argument("--lock", metavar="PATH",
+                        help="файл аренды ведущего (по умолчанию <файл задач>.lock)")
+    parser.add_argument("--no-lock", action="store_true",
+                        help="не согласовываться с другими экземплярами (каждый выполняет все задачи)")
+    parser.add_argument("--shards", type=int, metavar="N",
+                        help="разделить задачи между N дочерними процессами-планировщиками")
+    parser.add_argument("--shard", metavar="I/N", help=argparse.SUPPRESS)  # Служебный: номер шарда
+    parser.add_argument("--standby-since", type=float, help=argparse.SUPPRESS)  # Служебный: сроки шарда от
+    parser.add_argument("--warm-server", metavar="SOCKET", help=argparse.SUPPRESS)  # Служебный: тёплый Python
+    parser.add_argument("--replay", type=float, metavar="DAYS",
+                        help="прогнать расписание на DAYS дней вперёд в виртуальном времени и выйти")
+    parser.add_argument("--search", nargs="?", const="", metavar="ID",
+                        help="найти запуски задачи ID (без ID — всех задач) в логах и архивах и выйти")
+    parser.add_argument("--since", metavar="DATE", help="для --search: не раньше ГГГГ-ММ-ДД [ЧЧ:ММ]")
+    parser.add_argument("--until", metavar="DATE", help="для --search: не позже ГГГГ-ММ-ДД [ЧЧ:ММ] (день включительно)")
+    parser.add_argument("--failed", action="store_true", help="для --search: только неуспешные запуски")
+    parser.add_argument("--full", action="store_true", help="для --search: вывести блоки запусков из лога")
+    return parser.parse_args(argv)
+
+
+def print_run_stats(path, days=0):
+    """Вывести статистику истории запусков по задачам"""
+    if not os.path.exists(path):
+        raise SystemExit(f"История запусков не найдена: {path}")
+    history = RunHistory(path)
+    since = time.time() - days * 86400 if days else None
+    stats = history.task_stats(since=since)
+    history.close()
+
+    def sec(value):
+        return f"{value:.3f}" if value is not None else "—"
+
+    print("id\truns\tfail%\tp50\tp95\tp99\tlate_p50\tlate_p95\tlate_max")
+    for tid, item in sorted(stats.items()):
+        print(f"{tid}\t{item['runs']}\t{100 * item['failure_rate']:.1f}\t{sec(item['p50'])}\t"
+              f"{sec(item['p95'])}\t{sec(item['p99'])}\t{sec(item['late_p50'])}\t"
+              f"{sec(item['late_p95'])}\t{sec(item['late_max'])}")
+
+
+def print_search(args):
+    """Вывести запуски из индекса логов по фильтрам --search"""
+    started = time.perf_counter()
+    try:
+        runs = search_run_logs(args.search or None, args.since, args.until, args.failed)
+    except ValueError as e:
+        raise SystemExit(f"Ошибка: {e}")
+    elapsed = time.perf_counter() - started
+
+    for name, offset, started_at, tid, outcome, exit_code in runs:
+        moment = datetime.fromtimestamp(started_at).strftime("%Y-%m-%d %H:%M:%S") if started_at else "—"
+        code = exit_code if exit_code is not None else ""
+        print(f"{moment}\t{tid}\t{outcome}\t{code}\t{name}:{offset}")
+        if args.full:
+            for line in read_run_block(name, offset):
+                print(f"    {line}")
+    print(f"Найдено запусков: {len(runs)}, {elapsed * 1000:.0f} мс")
+
+
+def print_replay(days):
+    """Прогнать расписание TASKS в виртуальном времени и вывести число запусков по задачам"""
+    start = datetime.now().replace(second=0, microsecond=0)
+    end = start + timedelta(days=days)
+    started = time.perf_counter()
+    fires = replay_schedule(start, end)
+    elapsed = time.perf_counter() - started
+
+    counts = {}
+    for _, tid in fires:
+        counts[tid] = counts.get(tid, 0) + 1
+    ordered = all(a[0] <= b[0] for a, b in zip(fires, fires[1:]))
+
+    for cron_expr, full_command, options in TASKS:
+        print(f"{options['id']}\t{counts.get(options['id'], 0)}\t{cron_expr}\t{full_command}")
+    print(f"Период: {start:%Y-%m-%d %H:%M} — {end:%Y-%m-%d %H:%M}, запусков: {len(fires)}, "
+          f"порядок {'соблюдён' if ordered else 'НАРУШЕН'}, {elapsed:.2f} с "
+          f"({len(fires) / elapsed if elapsed else 0:.0f} запусков/с)")
+
+
+def run_cli(args):
+    """Разовые команды управления задачами; True — команда выполнена, запускать планировщик не нужно"""
+    if args.import_json:
+        import_tasks_json(args.import_json)
+        return True
+
+    if args.stats is not None:
+        print_run_stats(args.history, args.stats)
+        return True
+
+    if args.search is not None:
+        print_search(args)
+        return True
+
+    if args.replay is not None:
+        load_tasks()
+        print_replay(args.replay)
+        return True
+
+    if not (args.export_json or args.list or args.add or args.delete):
+        return False
+
+    load_tasks()
+    if args.add:
+        cron_expr, full_command = args.add
+        if compile_cron(cron_expr) is None:
+            raise SystemExit(f"Неверное cron-выражение: {cron_expr}")
+        if find_duplicate_task(cron_expr, full_command):
+            raise SystemExit("Такая задача уже существует")
+        print(task_id(insert_task(cron_expr, full_command)))
+    if args.delete and remove_task(args.delete) is None:
+        raise SystemExit(f"Задача не найдена: {args.delete}")
+    if args.list:
+        for cron_expr, full_command, options in TASKS:
+            print(f"{options['id']}\t{cron_expr}\t{full_command}")
+    if args.export_json:
+        export_tasks_json(args.export_json)
+    return True
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    if args.warm_server:
+        warm_server(args.warm_server)
+        sys.exit()
+    TASKS_FILE = args.tasks
+    LOG_TO_CONSOLE = not (args.list or args.add or args.delete or args.stats is not None or args.replay is not None
+                          or args.search is not None)
+    if args.db:
+        open_task_db(args.db)
+    if run_cli(args):
+        stop_logger()
+    elif args.shards and args.shards > 1:
+        if not args.no_lock:
+            lease = LeaderLease(args.lock or (args.db or TASKS_FILE) + ".lock")
+        run_shards(args.shards, sys.argv[1:])
+    else:
+        lock_path = args.lock or (args.db or TASKS_FILE) + ".lock"
+        if args.shard:
+            index, count = (int(part) for part in args.shard.split("/"))
+            shard = (index, count)
+            shard_parent = os.getppid()
+            if args.standby_since:
+                lease_standby_since = datetime.fromtimestamp(args.standby_since)
+            LOG_FILE_SUFFIX = f".shard{index}"
+            lock_path += f".{index}of{count}"
+            if args.metrics_port is not None:
+                args.metrics_port += index
+            if args.metrics_csv:
+                args.metrics_csv += f".shard{index}"
+        if not args.no_lock:
+            lease = LeaderLease(lock_path)
+        if not args.no_history:
+            open_run_history(args.history)
+        if args.metrics_csv:
+            metrics.open_csv(args.metrics_csv)
+        if args.metrics_port is not None:
+            start_metrics_server(args.metrics_port)
+        if args.headless:
+            run_headless()
+        else:
+            main()
\ No newline at end of file
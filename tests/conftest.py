@@ -0,0 +1,47 @@
+# Общие фикстуры: cron_task в изолированном каталоге и виртуальном времени
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import cron_task
+
+
+class Scheduler:
+    """Состояние планировщика для теста: запуски и сообщения лога собираются в списки"""
+
+    def __init__(self, path):
+        self.path = path
+        self.fires = []
+        self.messages = []
+
+    def start(self, *tasks):
+        """Задачи (cron, опции) с ID task0000, task0001, ... и расписание от текущего времени"""
+        cron_task.TASKS[:] = [[cron, f"echo {i}", dict(options, id=f"task{i:04d}")]
+                              for i, (cron, options) in enumerate(tasks)]
+        cron_task.reindex_tasks()
+        cron_task.setup_schedules()
+
+    def jump(self, **delta):
+        """Перевести виртуальные часы и выполнить такт планировщика"""
+        cron_task.clock.advance_to(cron_task.clock.now() + timedelta(**delta))
+        return cron_task.check_schedules()
+
+
+@pytest.fixture
+def scheduler(monkeypatch, tmp_path):
+    state = Scheduler(tmp_path)
+    monkeypatch.setattr(cron_task, "clock", cron_task.VirtualClock(datetime(2026, 1, 1)))
+    monkeypatch.setattr(cron_task, "job_executor",
+                        lambda tid, cmd, options, scheduled=None: state.fires.append((tid, scheduled)))
+    monkeypatch.setattr(cron_task, "log_message", lambda msg, *args, **kwargs: state.messages.append(msg))
+    monkeypatch.setattr(cron_task, "TASKS", [])
+    monkeypatch.setattr(cron_task, "tasks_by_id", {})
+    monkeypatch.setattr(cron_task, "TASKS_FILE", str(tmp_path / "cron_task.json"))
+    monkeypatch.setattr(cron_task, "LOG_DIR", str(tmp_path / "log"))
+    monkeypatch.setattr(cron_task, "tasks_file_signature", None)
+    (tmp_path / "log").mkdir()
+    yield state
+    with cron_task.schedule_cond:
+        cron_task.scheduled_jobs.clear()
+        cron_task.schedule_heap.clear()
@@ -0,0 +1,91 @@
+# Сверка движка cron (CronSpec) с croniter: случайные выражения и краевые случаи
+
+from datetime import datetime, timedelta
+
+import pytest
+
+croniter = pytest.importorskip("croniter").croniter
+
+import benchmark
+import cron_task
+
+EDGE_EXPRESSIONS = [
+    "0 12 * * 7",  # 7 — тоже воскресенье
+    "0 0 * * 5-7",
+    "0 0 * * 0,7",
+    "0 0 1-31 * 1",  # День месяца и день недели объединяются по ИЛИ
+    "0 0 13 * fri",
+    "30 8 1,15 * mon-fri",
+    "*/15 9-17 * * 1-5",
+    "0 9 * JAN mon",
+    "0 0 * jun-dec sun",
+    "0 0 29 2 *",
+    "@hourly",
+    "@daily",
+    "@midnight",
+    "@weekly",
+    "@monthly",
+    "@yearly",
+    "@annually",
+]
+BASES = [datetime(2026, 10, 18, 5, 0), datetime(2024, 2, 28, 23, 59), datetime(2025, 12, 31, 23, 30)]
+
+
+def next_runs(spec, base, steps):
+    result = []
+    current = base
+    for _ in range(steps):
+        current = spec.next_after(current)
+        result.append(current)
+    return result
+
+
+def test_random_expressions_match_croniter():
+    mismatches, _ = benchmark.verify_cron(samples=2000, steps=5, seed=1)
+    assert mismatches == []
+
+
+@pytest.mark.parametrize("expr", EDGE_EXPRESSIONS)
+@pytest.mark.parametrize("base", BASES)
+def test_edge_cases_match_croniter(expr, base):
+    spec = cron_task.compile_cron(expr)
+    assert spec is not None
+    it = croniter(expr, base)
+    assert next_runs(spec, base, 20) == [it.get_next(datetime) for _ in range(20)]
+
+
+def test_sunday_as_seven():
+    sunday = cron_task.compile_cron("0 12 * * 7").next_after(datetime(2026, 10, 17, 0, 0))
+    assert sunday == datetime(2026, 10, 18, 12, 0)
+    assert sunday.weekday() == 6
+
+
+def test_day_of_month_or_day_of_week():
+    # 1-31 вместе с днём недели — любой день, а не только понедельники
+    runs = next_runs(cron_task.compile_cron("0 0 1-31 * 1"), datetime(2026, 10, 18, 5, 0), 3)
+    assert runs == [datetime(2026, 10, 19), datetime(2026, 10, 20), datetime(2026, 10, 21)]
+
+
+def test_aliases_and_names():
+    base = datetime(2026, 10, 18, 5, 0)
+    assert cron_task.compile_cron("@weekly").next_after(base) == datetime(2026, 10, 25)
+    assert cron_task.compile_cron("@yearly").next_after(base) == datetime(2027, 1, 1)
+    assert cron_task.compile_cron("0 9 * JAN mon").next_after(base) == datetime(2027, 1, 4, 9, 0)
+    assert cron_task.compile_cron("0 9 * * MON-FRI").next_after(base) == datetime(2026, 10, 19, 9, 0)
+
+
+@pytest.mark.parametrize("expr", ["60 * * * *", "* 24 * * *", "* * 0 * *", "* * * 13 *", "* * * * 8",
+                                  "* * * *", "@reboot", "*/0 * * * *", "* * * foo *"])
+def test_invalid_expressions(expr):
+    assert cron_task.compile_cron(expr) is None
+
+
+def test_impossible_date_raises():
+    with pytest.raises(ValueError):
+        cron_task.compile_cron("0 0 31 2 *").next_after(datetime(2026, 1, 1))
+
+
+def test_next_after_is_strictly_later():
+    spec = cron_task.compile_cron("* * * * *")
+    base = datetime(2026, 10, 18, 5, 0)
+    assert spec.next_after(base) == base + timedelta(minutes=1)
@@ -0,0 +1,109 @@
+# Пул выполнения: предел потоков и политика перекрытия запусков одной задачи
+
+import threading
+import time
+
+import pytest
+
+import cron_task
+
+WAIT = 5  # Сек на ожидание события в тесте
+
+
+class Runs:
+    """Запуски, которые держатся до release(); started — ключи в порядке старта"""
+
+    def __init__(self):
+        self.started = []
+        self.gate = threading.Event()
+        self.done = threading.Semaphore(0)
+        self._lock = threading.Lock()
+        self._step = threading.Condition(self._lock)
+
+    def __call__(self, key):
+        with self._lock:
+            self.started.append(key)
+            self._step.notify_all()
+        try:
+            self.gate.wait(WAIT)
+        finally:
+            self.done.release()
+
+    def wait_started(self, count):
+        with self._lock:
+            assert self._step.wait_for(lambda: len(self.started) >= count, WAIT), self.started
+
+    def release(self, completed):
+        self.gate.set()
+        for _ in range(completed):
+            assert self.done.acquire(timeout=WAIT)
+
+
+def wait_idle(pool, key):
+    """Запуск отпускает release() раньше, чем пул снимает его с учёта, — ждём и это"""
+    deadline = time.monotonic() + WAIT
+    while pool.is_busy(key):
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(cron_task, "log_message", lambda msg, *args, **kwargs: None)
+    return cron_task.ExecutionPool(2)
+
+
+def test_skip_drops_run_while_previous_is_running(pool):
+    runs = Runs()
+    assert pool.submit("a", runs, ("a",), cron_task.OVERLAP_SKIP) == "queued"
+    runs.wait_started(1)
+    assert pool.submit("a", runs, ("a",), cron_task.OVERLAP_SKIP) == "skipped"
+    assert pool.is_busy("a")
+    runs.release(1)
+    assert runs.started == ["a"]
+    assert pool.stats()["skipped"] == 1
+
+
+def test_queue_one_keeps_a_single_deferred_run(pool):
+    runs = Runs()
+    pool.submit("a", runs, ("a",), cron_task.OVERLAP_QUEUE_ONE)
+    runs.wait_started(1)
+    assert pool.submit("a", runs, ("a",), cron_task.OVERLAP_QUEUE_ONE) == "deferred"
+    assert pool.submit("a", runs, ("a",), cron_task.OVERLAP_QUEUE_ONE) == "skipped"
+    assert pool.stats()["deferred"] == 1
+    runs.release(2)  # Отложенный запуск стартует после завершения текущего
+    assert runs.started == ["a", "a"]
+    wait_idle(pool, "a")
+
+
+def test_allow_runs_in_parallel_up_to_max_workers(pool):
+    runs = Runs()
+    for key in ("a", "a", "b"):
+        assert pool.submit(key, runs, (key,), cron_task.OVERLAP_ALLOW) == "queued"
+    runs.wait_started(2)
+    stats = pool.stats()
+    assert (stats["running"], stats["queue_depth"]) == (2, 1)  # Третий ждёт свободный поток
+    runs.release(3)
+    assert sorted(runs.started) == ["a", "a", "b"]
+    wait_idle(pool, "a")
+    wait_idle(pool, "b")
+    assert pool.stats()["completed"] == 3
+
+
+def test_error_in_run_does_not_stop_the_worker(pool):
+    done = threading.Event()
+
+    def broken():
+        raise RuntimeError("сбой")
+
+    pool.submit("a", broken)
+    pool.submit("a", done.set)
+    assert done.wait(WAIT)
+
+
+def test_submit_run_falls_back_to_default_policy(monkeypatch):
+    calls = []
+    monkeypatch.setattr(cron_task.execution_pool, "submit",
+                        lambda key, func, args=(), policy=None: calls.append(policy) or "queued")
+    cron_task.submit_run("task0000", "echo", {"overlap": "неизвестная"})
+    assert calls == [cron_task.DEFAULT_OVERLAP_POLICY]
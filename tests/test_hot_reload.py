@@ -0,0 +1,93 @@
+# Горячая перезагрузка файла задач: diff, выдача ID, битый файл
+
+import json
+import os
+
+import pytest
+
+import cron_task
+
+
+def write_tasks(scheduler, tasks):
+    path = cron_task.TASKS_FILE
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(tasks, f)
+    # Подпись файла зависит от mtime: разводим записи в пределах одной секунды
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + len(scheduler.messages) + 1))
+
+
+def read_tasks():
+    with open(cron_task.TASKS_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_load_assigns_and_saves_missing_ids(scheduler):
+    write_tasks(scheduler, [["* * * * *", "echo a"], ["0 * * * *", "echo b", {"id": "keep0001"}]])
+    cron_task.load_tasks()
+    saved = read_tasks()
+    assert saved[1][2]["id"] == "keep0001"
+    assert saved[0][2]["id"] and saved[0][2]["id"] != "keep0001"
+    assert set(cron_task.tasks_by_id) == {saved[0][2]["id"], "keep0001"}
+
+
+def test_duplicate_ids_are_reassigned(scheduler):
+    write_tasks(scheduler, [["* * * * *", "echo a", {"id": "same"}], ["0 * * * *", "echo b", {"id": "same"}]])
+    cron_task.load_tasks()
+    ids = [task[2]["id"] for task in read_tasks()]
+    assert ids[0] == "same" and ids[1] != "same"
+
+
+@pytest.mark.parametrize("content", ["[[\"* * * * *\", \"echo a\"", "{\"tasks\": []}"])
+def test_broken_file_is_kept_on_startup(scheduler, content):
+    with open(cron_task.TASKS_FILE, "w", encoding="utf-8") as f:
+        f.write(content)
+    with pytest.raises(SystemExit):
+        cron_task.load_tasks()
+    with open(cron_task.TASKS_FILE, encoding="utf-8") as f:
+        assert f.read() == content
+
+
+def test_reload_diff_keeps_unchanged_jobs(scheduler):
+    write_tasks(scheduler, [["* * * * *", "echo a", {"id": "a"}], ["0 * * * *", "echo b", {"id": "b"}],
+                            ["*/5 * * * *", "echo c", {"id": "c"}]])
+    cron_task.load_tasks()
+    cron_task.setup_schedules()
+    job_a = cron_task.scheduled_jobs["a"]
+
+    write_tasks(scheduler, [["* * * * *", "echo a", {"id": "a"}], ["30 * * * *", "echo b", {"id": "b"}],
+                            ["0 0 * * *", "echo d", {"id": "d"}]])
+    cron_task.reload_tasks_file()
+
+    assert cron_task.scheduled_jobs["a"] is job_a
+    assert set(cron_task.scheduled_jobs) == {"a", "b", "d"}
+    assert cron_task.scheduled_jobs["b"]["expr"] == "30 * * * *"
+    assert "добавлено 1, изменено 1, удалено 1" in "".join(scheduler.messages)
+
+
+def test_reload_reuses_id_for_same_task_without_id(scheduler):
+    write_tasks(scheduler, [["* * * * *", "echo a", {"id": "a"}]])
+    cron_task.load_tasks()
+    cron_task.setup_schedules()
+
+    write_tasks(scheduler, [["* * * * *", "echo a"], ["0 * * * *", "echo new"]])
+    cron_task.reload_tasks_file()
+
+    ids = [task[2]["id"] for task in read_tasks()]
+    assert ids[0] == "a" and ids[1] not in ("a", None)
+    assert set(cron_task.scheduled_jobs) == set(ids)
+
+
+def test_broken_reload_leaves_schedule(scheduler):
+    write_tasks(scheduler, [["* * * * *", "echo a", {"id": "a"}]])
+    cron_task.load_tasks()
+    cron_task.setup_schedules()
+    job = cron_task.scheduled_jobs["a"]
+
+    with open(cron_task.TASKS_FILE, "w", encoding="utf-8") as f:
+        f.write("[[\"* * * * *\"")
+    os.utime(cron_task.TASKS_FILE, ns=(0, 1))
+    cron_task.reload_tasks_file()
+
+    assert cron_task.scheduled_jobs == {"a": job}
+    assert "не применены" in scheduler.messages[-1]
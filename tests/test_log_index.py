@@ -0,0 +1,114 @@
+# Индекс запусков в логах: разбор блоков, дочитывание, архивы и фильтры поиска
+
+import os
+from datetime import datetime
+
+import pytest
+
+import cron_task
+
+
+def block(written, tid, start, result):
+    """Блок запуска, как его пишет run_script: все строки — со временем записи (конец запуска)"""
+    prefix = f"{written:%Y-%m-%d %H:%M:%S},000 - INFO - "
+    return (f"{prefix}🔄 [#{tid}] [{start}] Задача: python job.py\n"
+            f"{prefix}┌───────────────────────────────\n"
+            f"{prefix}│ 📤 [{start}] вывод\n"
+            f"{prefix}│ {result}\n"
+            f"{prefix}└───────────────────────────────\n")
+
+
+@pytest.fixture
+def logs(monkeypatch, tmp_path):
+    monkeypatch.setattr(cron_task, "LOG_DIR", str(tmp_path))
+    monkeypatch.setattr(cron_task, "flush_logger", lambda *args, **kwargs: None)
+    index = cron_task.LogIndex()
+    yield tmp_path, index
+    index.close()
+
+
+def write(path, text):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_blocks_are_parsed_with_outcome_code_and_start(logs):
+    log_dir, index = logs
+    path = log_dir / "cron_task_2026-01-02.log"
+    write(path, block(datetime(2026, 1, 2, 10, 0, 5), "aaaa0001", "10:00:00", "✅ [10:00:05] Успешно завершена")
+          + "2026-01-02 10:01:00,000 - INFO - 📌 Посторонняя строка\n"
+          + block(datetime(2026, 1, 2, 11, 0, 2), "bbbb0002", "11:00:00", "💥 [11:00:02] Ошибка (код 3)")
+          + block(datetime(2026, 1, 2, 12, 0, 9), "aaaa0001", "12:00:00",
+                  "⏰ [12:00:09] Прервана: превышено время, группа процессов завершена (код -15)"))
+    assert index.update() == 3
+
+    runs = index.search()
+    assert [(r[3], r[4], r[5]) for r in runs] == [("aaaa0001", "ok", None), ("bbbb0002", "error", 3),
+                                                  ("aaaa0001", "timeout", -15)]
+    assert runs[0][2] == datetime(2026, 1, 2, 10, 0, 0).timestamp()  # Начало, а не время записи
+    lines = cron_task.read_run_block(runs[1][0], runs[1][1])
+    assert len(lines) == 5
+    assert lines[0].endswith("🔄 [#bbbb0002] [11:00:00] Задача: python job.py")
+
+
+def test_run_across_midnight_starts_previous_day(logs):
+    log_dir, index = logs
+    write(log_dir / "cron_task_2026-01-03.log",
+          block(datetime(2026, 1, 3, 0, 0, 10), "aaaa0001", "23:59:50", "✅ [00:00:10] Успешно завершена"))
+    index.update()
+    assert index.search()[0][2] == datetime(2026, 1, 2, 23, 59, 50).timestamp()
+
+
+def test_unfinished_block_is_indexed_once_when_complete(logs):
+    log_dir, index = logs
+    path = log_dir / "cron_task_2026-01-02.log"
+    text = block(datetime(2026, 1, 2, 10, 0, 5), "aaaa0001", "10:00:00", "💥 [10:00:05] Ошибка (код 1)")
+    head, tail = text[:text.rindex("2026-01-02")], text[text.rindex("2026-01-02"):]
+    write(path, head + tail[:20])  # Последняя строка ещё не дописана
+    assert index.update() == 0
+    write(path, tail[20:])
+    assert index.update() == 1
+    assert index.update() == 0
+    assert [r[4] for r in index.search()] == ["error"]
+
+
+def test_archived_log_is_searched_and_read(logs, monkeypatch):
+    log_dir, index = logs
+    monkeypatch.setattr(cron_task, "ARCHIVE_MEMBER_SIZE", 1024)  # Несколько блоков: чтение начнётся с середины
+    path = log_dir / "cron_task_2026-01-02.log"
+    write(path, "".join(block(datetime(2026, 1, 2, 10, n, 5), f"task{n:04d}", f"10:{n:02d}:00",
+                              "✅ [10:00:05] Успешно завершена") for n in range(30)))
+    cron_task.archive_log_file(str(path), "gzip")
+    assert not path.exists()
+    assert index.update() == 30
+    found = index.search("task0017")
+    assert len(found) == 1
+    assert "[#task0017]" in cron_task.read_run_block(found[0][0], found[0][1])[0]
+
+
+def test_search_filters_and_removed_files(logs):
+    log_dir, index = logs
+    first, second = log_dir / "cron_task_2026-01-02.log", log_dir / "cron_task_2026-01-03.log"
+    write(first, block(datetime(2026, 1, 2, 10, 0, 5), "aaaa0001", "10:00:00", "💥 [10:00:05] Ошибка (код 1)"))
+    write(second, block(datetime(2026, 1, 3, 10, 0, 5), "aaaa0001", "10:00:00", "✅ [10:00:05] Успешно завершена")
+          + block(datetime(2026, 1, 3, 11, 0, 5), "bbbb0002", "11:00:00", "💥 [11:00:05] Ошибка (код 2)"))
+    index.update()
+
+    assert len(index.search("aaaa0001")) == 2
+    assert [r[3] for r in index.search(failures_only=True)] == ["aaaa0001", "bbbb0002"]
+    day = cron_task.parse_search_date("2026-01-03"), cron_task.parse_search_date("2026-01-03", end=True)
+    assert [r[3] for r in index.search(since=day[0], until=day[1])] == ["aaaa0001", "bbbb0002"]
+
+    os.remove(first)  # Удалён по сроку хранения
+    index.update()
+    assert [r[0] for r in index.search("aaaa0001")] == ["cron_task_2026-01-03.log"]
+
+
+def test_search_run_logs_parses_dates(logs):
+    log_dir, _ = logs
+    write(log_dir / "cron_task_2026-01-02.log",
+          block(datetime(2026, 1, 2, 10, 0, 5), "aaaa0001", "10:00:00", "✅ [10:00:05] Успешно завершена"))
+    assert len(cron_task.search_run_logs("aaaa0001", "2026-01-02 09:00", "2026-01-02")) == 1
+    assert cron_task.search_run_logs("aaaa0001", "2026-01-03") == []
+    with pytest.raises(ValueError):
+        cron_task.search_run_logs(since="02.01.2026")
@@ -0,0 +1,82 @@
+# Метрики планировщика: гистограммы, запись запусков, CSV и HTTP-эндпоинт
+
+import csv
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+import pytest
+
+import cron_task
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    fresh = cron_task.SchedulerMetrics()
+    monkeypatch.setattr(cron_task, "metrics", fresh)
+    monkeypatch.setattr(cron_task, "log_message", lambda msg, *args, **kwargs: None)
+    yield fresh
+    if fresh.csv_file:
+        fresh.csv_file.close()
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = cron_task.Histogram((0.1, 1, 10))
+    for value in (0.05, 0.1, 0.5, 3, 100):
+        histogram.observe(value)
+    assert histogram.render("x") == ['x_bucket{le="0.1"} 2',  # Граница входит в корзину (le)
+                                     'x_bucket{le="1"} 3',
+                                     'x_bucket{le="10"} 4',
+                                     'x_bucket{le="+Inf"} 5',
+                                     "x_sum 103.650000",
+                                     "x_count 5"]
+
+
+def test_record_fire_splits_scheduled_and_manual(metrics):
+    planned = datetime(2026, 1, 1, 12, 0)
+    metrics.record_fire("task0000", planned, planned.timestamp() + 0.3)
+    metrics.record_fire("task0000", planned, planned.timestamp() - 1)  # Раньше срока — в корзину 0
+    metrics.record_fire("task0001", None, planned.timestamp())
+    assert (metrics.fires, metrics.manual_fires) == (2, 1)
+    assert metrics.last_lateness == pytest.approx(-1)
+    assert metrics.lateness.count == 2 and metrics.lateness.counts[0] == 1
+
+    text = metrics.render()
+    assert 'cron_task_fires_total{trigger="schedule"} 2' in text
+    assert 'cron_task_fires_total{trigger="manual"} 1' in text
+    assert 'cron_task_fire_lateness_seconds_bucket{le="+Inf"} 2' in text
+    assert "# TYPE cron_task_queue_depth gauge" in text
+
+
+def test_csv_gets_header_once_and_a_row_per_fire(metrics, tmp_path):
+    path = str(tmp_path / "metrics.csv")
+    planned = datetime(2026, 1, 1, 12, 0)
+    metrics.open_csv(path)
+    metrics.record_fire("task0000", planned, planned.timestamp() + 0.25)
+    metrics.csv_file.close()
+    metrics.open_csv(path)  # Повторное открытие дописывает без второго заголовка
+    metrics.record_fire("task0001", None, planned.timestamp())
+    metrics.csv_file.close()
+    metrics.csv_file = None
+
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == list(cron_task.METRICS_CSV_FIELDS)
+    assert [row[0] for row in rows[1:]] == ["task0000", "task0001"]
+    assert rows[1][3] == "0.250" and rows[2][1] == rows[2][3] == ""
+
+
+def test_http_endpoint_serves_metrics_only(metrics):
+    metrics.record_tick(0.002)
+    server = cron_task.start_metrics_server(0)
+    try:
+        url = f"http://{cron_task.METRICS_HOST}:{server.server_port}"
+        with urllib.request.urlopen(url + "/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert "cron_task_tick_duration_seconds_count 1" in response.read().decode("utf-8")
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(url + "/other", timeout=5)
+        assert error.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,98 @@
+# Политики пропущенных сроков (misfire) и подсчёт сроков по маскам
+
+import random
+from datetime import datetime, timedelta
+
+import benchmark
+import cron_task
+
+
+def test_coalesce_uses_latest_slot_and_exact_count(scheduler):
+    scheduler.start(("* * * * *", {}))
+    scheduler.jump(hours=3)
+    assert scheduler.fires == [("task0000", datetime(2026, 1, 1, 3, 0))]
+    assert "Пропущено запусков: 180 " in scheduler.messages[-1]
+    assert cron_task.scheduled_jobs["task0000"]["next_run"] == datetime(2026, 1, 1, 3, 1)
+
+
+def test_coalesce_after_week_long_sleep_is_fast(scheduler):
+    scheduler.start(*[("* * * * *", {}) for _ in range(200)])
+    began = datetime.now()
+    scheduler.jump(days=7, seconds=30)
+    assert (datetime.now() - began).total_seconds() < 5
+    assert len(scheduler.fires) == 200
+    assert all(scheduled == datetime(2026, 1, 8) for _, scheduled in scheduler.fires)
+    assert "Пропущено запусков: 10080 " in scheduler.messages[-1]
+
+
+def test_skip_does_not_fire(scheduler):
+    scheduler.start(("*/5 * * * *", {"misfire": "skip"}))
+    scheduler.jump(hours=1)
+    assert scheduler.fires == []
+    assert "Пропущено запусков: 12 " in scheduler.messages[-1]
+    assert cron_task.scheduled_jobs["task0000"]["next_run"] == datetime(2026, 1, 1, 1, 5)
+
+
+def test_all_fires_each_slot_up_to_limit(scheduler):
+    scheduler.start(("*/10 * * * *", {"misfire": "all"}), ("* * * * *", {"misfire": "all"}))
+    scheduler.jump(hours=1)
+    every_ten = [scheduled for tid, scheduled in scheduler.fires if tid == "task0000"]
+    assert every_ten == [datetime(2026, 1, 1, 0, m) for m in range(10, 60, 10)] + [datetime(2026, 1, 1, 1, 0)]
+    assert len([tid for tid, _ in scheduler.fires if tid == "task0001"]) == 60
+
+
+def test_all_is_capped(scheduler):
+    scheduler.start(("* * * * *", {"misfire": "all"}))
+    scheduler.jump(hours=5)
+    assert len(scheduler.fires) == cron_task.MISFIRE_MAX_FIRES
+    assert scheduler.fires[0][1] == datetime(2026, 1, 1, 0, 1)
+    assert "Пропущено запусков: 300 " in scheduler.messages[-1]
+
+
+def test_late_within_grace_runs_normally(scheduler):
+    scheduler.start(("0 * * * *", {}))
+    scheduler.jump(hours=1, seconds=30)
+    assert scheduler.fires == [("task0000", datetime(2026, 1, 1, 1, 0))]
+    assert scheduler.messages == []
+
+
+def test_jitter_shifts_border(scheduler):
+    scheduler.start(("0 * * * *", {"jitter": 1200}))
+    jitter = cron_task.scheduled_jobs["task0000"]["jitter"]
+    scheduler.jump(hours=5)
+    expected_last = datetime(2026, 1, 1, 5, 0) if jitter == timedelta(0) else datetime(2026, 1, 1, 4, 0)
+    assert scheduler.fires == [("task0000", expected_last + jitter)]
+
+
+def walk_count(spec, after, until):
+    count, slot = 0, spec.next_after(after)
+    while slot <= until:
+        count += 1
+        slot = spec.next_after(slot)
+    return count
+
+
+def test_count_between_matches_walk():
+    rnd = random.Random(3)
+    checked = 0
+    while checked < 300:
+        spec = cron_task.compile_cron(benchmark.random_cron_expr(rnd))
+        if not isinstance(spec, cron_task.CronSpec):
+            continue
+        after = datetime(2025, 1, 1) + timedelta(minutes=rnd.randrange(60 * 24 * 365), seconds=rnd.randrange(60))
+        until = after + timedelta(minutes=rnd.randrange(60 * 24 * 40))
+        assert spec.count_between(after, until) == walk_count(spec, after, until), spec.expr
+        checked += 1
+
+
+def test_last_slot_matches_walk():
+    rnd = random.Random(4)
+    for _ in range(200):
+        spec = cron_task.compile_cron(benchmark.random_cron_expr(rnd))
+        base = datetime(2025, 1, 1) + timedelta(minutes=rnd.randrange(60 * 24 * 365))
+        first = spec.next_after(base)
+        border = first + timedelta(minutes=rnd.randrange(60 * 24 * 30), seconds=rnd.randrange(60))
+        last, slot = first, spec.next_after(first)
+        while slot <= border:
+            last, slot = slot, spec.next_after(slot)
+        assert cron_task._last_slot(spec, first, border) == last, spec.expr
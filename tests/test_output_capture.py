@@ -0,0 +1,66 @@
+# Захват вывода: память ограничена, полный вывод — в отдельном файле
+
+import pytest
+
+import cron_task
+
+
+@pytest.fixture
+def log_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(cron_task, "LOG_DIR", str(tmp_path))
+    monkeypatch.setattr(cron_task, "OUTPUT_HEAD_LINES", 2)
+    monkeypatch.setattr(cron_task, "OUTPUT_TAIL_LINES", 3)
+    monkeypatch.setattr(cron_task, "OUTPUT_LINE_LIMIT", 64)
+    return tmp_path
+
+
+def read_spill(capture):
+    with open(capture.spill_path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_small_output_stays_in_memory(log_dir):
+    capture = cron_task.OutputCapture(limit=1024)
+    for i in range(5):
+        capture.append(f"строка {i}")
+    assert capture.close() == [f"строка {i}" for i in range(5)]
+    assert capture.spill_path is None
+    assert list(log_dir.iterdir()) == []
+
+
+def test_spill_keeps_head_and_tail_and_writes_everything(log_dir):
+    capture = cron_task.OutputCapture(limit=100)
+    lines = [f"строка {i:03d}" for i in range(50)]
+    for line in lines:
+        capture.append(line)
+    shown = capture.close()
+
+    assert read_spill(capture) == lines
+    assert shown[:2] == lines[:2] and shown[-3:] == lines[-3:]
+    assert len(shown) == 2 + 1 + 3
+    assert "Пропущено строк: 45" in shown[2] and capture.spill_path in shown[2]
+    assert capture.total_bytes == sum(len(line.encode("utf-8")) + 1 for line in lines)
+
+
+def test_long_line_is_clipped_in_log_but_full_in_file(log_dir):
+    capture = cron_task.OutputCapture(limit=1024)
+    capture.append("начало")
+    long_line = "я" * 100  # 200 байт в UTF-8
+    capture.append(long_line)
+    shown = capture.close()
+
+    assert read_spill(capture) == ["начало", long_line]
+    clipped = shown[-1]
+    assert clipped.startswith("я" * 32) and "✂️ (+136 байт)" in clipped
+    assert len(clipped.split(" ✂️")[0].encode("utf-8")) <= 64
+
+
+def test_spill_without_writable_dir(log_dir, monkeypatch):
+    monkeypatch.setattr(cron_task, "LOG_DIR", str(log_dir / "нет такого каталога"))
+    capture = cron_task.OutputCapture(limit=10)
+    for i in range(20):
+        capture.append(f"строка {i}")
+    shown = capture.close()
+    assert capture.spill_path is None
+    assert "полный вывод не сохранён" in shown[-4]  # Перед последними 3 строками
+    assert shown[-1] == "строка 19"
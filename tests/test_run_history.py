@@ -0,0 +1,47 @@
+# История запусков: сводка для таблицы и сохранённые кодировки вывода
+
+import pytest
+
+import cron_task
+
+
+@pytest.fixture
+def history(monkeypatch, tmp_path):
+    monkeypatch.setattr(cron_task, "run_history", None)
+    monkeypatch.setattr(cron_task, "run_summary", {})
+    monkeypatch.setattr(cron_task, "detected_encodings", {})
+    monkeypatch.setattr(cron_task, "log_message", lambda msg, *args, **kwargs: None)
+    path = str(tmp_path / "run_history.db")
+    cron_task.open_run_history(path)
+    yield path
+    cron_task.run_history.close()
+
+
+def reopen(path):
+    cron_task.run_history.close()
+    cron_task.detected_encodings.clear()
+    cron_task.open_run_history(path)
+
+
+def test_summary_survives_restart(history):
+    cron_task.record_run("task0000", 100.0, 100.5, 102.0, 0, 10)
+    cron_task.record_run("task0000", 160.0, 160.1, 161.1, 1, 0)
+    reopen(history)
+    last, runs, ok = cron_task.run_summary["task0000"]
+    assert last == pytest.approx(1.0) and (runs, ok) == (2, 1)
+
+
+def test_detected_encoding_survives_restart(history):
+    cron_task.remember_encoding("task0000", "out", "cp866")
+    cron_task.remember_encoding("task0000", "err", "cp1251")
+    cron_task.remember_encoding("task0000", "out", "koi8_r")
+    reopen(history)
+    assert cron_task.detected_encodings == {("task0000", "out"): "koi8_r", ("task0000", "err"): "cp1251"}
+
+
+def test_encoding_without_history_is_kept_in_memory(history):
+    cron_task.run_history.close()
+    cron_task.run_history = None
+    cron_task.remember_encoding("task0000", "out", "cp866")
+    assert cron_task.detected_encodings[("task0000", "out")] == "cp866"
+    cron_task.open_run_history(history)  # Для закрытия в фикстуре
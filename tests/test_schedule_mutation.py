@@ -0,0 +1,60 @@
+# Изменение расписания по одной задаче: schedule_task / unschedule_task без полной перестройки
+
+from datetime import datetime
+
+import cron_task
+
+
+def job(tid):
+    return cron_task.scheduled_jobs.get(tid)
+
+
+def live_heap_ids():
+    return sorted(entry[2]["id"] for entry in cron_task.schedule_heap
+                  if cron_task.scheduled_jobs.get(entry[2]["id"]) is entry[2])
+
+
+def test_same_expression_keeps_next_run(scheduler):
+    scheduler.start(("0 * * * *", {}))
+    before = job("task0000")["next_run"]
+    scheduler.jump(minutes=30)
+    cron_task.schedule_task(("0 * * * *", "echo новая", {"id": "task0000"}))
+    assert job("task0000")["next_run"] == before  # Срок не сдвинулся от «сейчас»
+    assert job("task0000")["task"] == "echo новая"
+
+
+def test_changed_expression_recomputes_from_now(scheduler):
+    scheduler.start(("0 * * * *", {}), ("*/5 * * * *", {}))
+    other = job("task0001")
+    scheduler.jump(minutes=7)
+    assert cron_task.schedule_task(("30 * * * *", "echo 0", {"id": "task0000"}))
+    assert job("task0000")["next_run"] == datetime(2026, 1, 1, 0, 30)
+    assert job("task0001") is other  # Остальные задания не тронуты
+
+
+def test_invalid_expression_unschedules(scheduler):
+    scheduler.start(("0 * * * *", {}))
+    assert not cron_task.schedule_task(("99 * * * *", "echo 0", {"id": "task0000"}))
+    assert job("task0000") is None
+    scheduler.jump(hours=2)
+    assert scheduler.fires == []
+
+
+def test_unschedule_is_lazy_and_heap_is_compacted(scheduler):
+    tasks = [(f"{i % 60} * * * *", {}) for i in range(300)]
+    scheduler.start(*tasks)
+    for i in range(200):
+        cron_task.unschedule_task(f"task{i:04d}")
+    assert len(cron_task.scheduled_jobs) == 100
+    assert len(cron_task.schedule_heap) < 300  # Устаревшие записи вычищены, а не копятся
+    assert live_heap_ids() == sorted(cron_task.scheduled_jobs)
+
+
+def test_repeated_reschedule_fires_once_at_latest_time(scheduler):
+    scheduler.start(("0 * * * *", {}))
+    for minute in (10, 20, 15):
+        cron_task.schedule_task((f"{minute} * * * *", "echo 0", {"id": "task0000"}))
+    scheduler.jump(minutes=16)
+    assert scheduler.fires == [("task0000", datetime(2026, 1, 1, 0, 15))]
+    scheduler.jump(minutes=10)
+    assert len(scheduler.fires) == 1  # Старые записи в куче не срабатывают
@@ -0,0 +1,79 @@
+# Сглаживание всплесков: ограничение частоты запусков и постоянный jitter задач
+
+from datetime import timedelta
+
+import pytest
+
+import cron_task
+
+
+class Monotonic:
+    """Подменяемые time.monotonic для TokenBucket"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def monotonic(monkeypatch):
+    fake = Monotonic()
+    monkeypatch.setattr(cron_task.time, "monotonic", fake)
+    return fake
+
+
+def test_bucket_allows_burst_then_waits(monotonic):
+    bucket = cron_task.TokenBucket(rate=2, burst=3)
+    assert [bucket.take() for _ in range(3)] == [0, 0, 0]
+    assert bucket.take() == pytest.approx(0.5)  # Следующий токен — через 1/rate
+    monotonic.now += 0.5
+    assert bucket.take() == 0
+    assert bucket.take() == pytest.approx(0.5)
+
+
+def test_bucket_refill_is_capped_by_burst(monotonic):
+    bucket = cron_task.TokenBucket(rate=10, burst=2)
+    bucket.take()
+    bucket.take()
+    monotonic.now += 3600
+    assert [bucket.take() for _ in range(2)] == [0, 0]
+    assert bucket.take() > 0
+
+
+def test_pool_counts_rate_limited_waits(monkeypatch):
+    monkeypatch.setattr(cron_task, "log_message", lambda msg, *args, **kwargs: None)
+    pool = cron_task.ExecutionPool(4, spawn_rate=200, spawn_burst=1)
+    done = []
+    for n in range(3):
+        pool.submit(n, done.append, (n,))
+    deadline = cron_task.time.monotonic() + 5
+    while pool.stats()["completed"] < 3:
+        assert cron_task.time.monotonic() < deadline
+        cron_task.time.sleep(0.001)
+    assert sorted(done) == [0, 1, 2]
+    assert pool.stats()["rate_limited"] >= 1
+
+
+def test_jitter_is_stable_and_inside_window():
+    shifts = [cron_task.task_jitter({"id": f"task{i:04d}", "jitter": 30}) for i in range(200)]
+    assert shifts == [cron_task.task_jitter({"id": f"task{i:04d}", "jitter": 30}) for i in range(200)]
+    assert all(timedelta(0) <= shift < timedelta(seconds=30) for shift in shifts)
+    assert len(set(shifts)) > 100  # Задачи разнесены по окну, а не стартуют вместе
+
+
+@pytest.mark.parametrize("jitter", [0, -5, "нет"])
+def test_jitter_off_or_invalid(monkeypatch, jitter):
+    monkeypatch.setattr(cron_task, "DEFAULT_JITTER", 0)
+    assert cron_task.task_jitter({"id": "task0000", "jitter": jitter}) == timedelta(0)
+
+
+def test_scheduler_fires_after_jitter(scheduler):
+    scheduler.start(("0 * * * *", {"jitter": 600}))
+    shift = cron_task.task_jitter({"id": "task0000", "jitter": 600})
+    assert shift > timedelta(0)
+    scheduler.jump(hours=1)  # 01:00 — срок cron наступил, но сдвиг ещё нет
+    assert scheduler.fires == []
+    scheduler.jump(seconds=600)
+    assert [tid for tid, _ in scheduler.fires] == ["task0000"]
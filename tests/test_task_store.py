@@ -0,0 +1,80 @@
+# Хранение задач: атомарная запись JSON и SQLite с изменениями по одной строке
+
+import json
+import os
+import stat
+
+import pytest
+
+import cron_task
+
+
+def listing(path):
+    return sorted(os.listdir(path))
+
+
+def test_atomic_write_keeps_file_mode(tmp_path):
+    path = tmp_path / "cron_task.json"
+    path.write_text("[]", encoding="utf-8")
+    os.chmod(path, 0o640)
+    cron_task.write_json_atomic(str(path), [["* * * * *", "echo ё"]])
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    assert json.loads(path.read_text(encoding="utf-8")) == [["* * * * *", "echo ё"]]
+    assert listing(tmp_path) == ["cron_task.json"]  # Временный файл не остался
+
+
+def test_atomic_write_new_file_uses_umask(tmp_path):
+    path = tmp_path / "new.json"
+    cron_task.write_json_atomic(str(path), [])
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~cron_task.UMASK
+
+
+def test_failed_write_leaves_old_file(tmp_path):
+    path = tmp_path / "cron_task.json"
+    path.write_text('[["* * * * *", "echo old"]]', encoding="utf-8")
+    with pytest.raises(TypeError):
+        cron_task.write_json_atomic(str(path), [object()])
+    assert json.loads(path.read_text(encoding="utf-8")) == [["* * * * *", "echo old"]]
+    assert listing(tmp_path) == ["cron_task.json"]
+
+
+@pytest.fixture
+def store(tmp_path):
+    db = cron_task.SqliteTaskStore(str(tmp_path / "tasks.db"))
+    yield db
+    db.close()
+
+
+def test_store_upsert_keeps_position_and_options(store):
+    store.replace_all([("* * * * *", "echo a", {"id": "a"}), ("0 * * * *", "echo b", {"id": "b", "jitter": 5})])
+    store.upsert(("5 * * * *", "echo a2", {"id": "a", "overlap": "skip"}))
+    store.upsert(("0 0 * * *", "echo c", {"id": "c"}))
+    assert store.load() == [("5 * * * *", "echo a2", {"id": "a", "overlap": "skip"}),
+                            ("0 * * * *", "echo b", {"id": "b", "jitter": 5}),
+                            ("0 0 * * *", "echo c", {"id": "c"})]
+    store.delete("b")
+    assert [task[2]["id"] for task in store.load()] == ["a", "c"]
+
+
+def test_insert_and_remove_write_single_rows(scheduler, monkeypatch, store):
+    monkeypatch.setattr(cron_task, "task_db", store)
+    calls = []
+    monkeypatch.setattr(store, "replace_all", lambda tasks: calls.append("replace_all"))
+    task = cron_task.insert_task("* * * * *", "echo a")
+    assert store.load() == [task]
+    cron_task.remove_task(cron_task.task_id(task))
+    assert store.load() == []
+    assert calls == []  # Полная перезапись не нужна
+
+
+def test_new_db_is_filled_from_json(scheduler, monkeypatch, tmp_path):
+    cron_task.write_json_atomic(cron_task.TASKS_FILE, [["* * * * *", "echo a", {"id": "keep0001"}],
+                                                       ["0 * * * *", "echo b"]])
+    monkeypatch.setattr(cron_task, "task_db", None)
+    cron_task.open_task_db(str(tmp_path / "tasks.db"))
+    try:
+        cron_task.load_tasks()
+        assert [task[1] for task in cron_task.TASKS] == ["echo a", "echo b"]
+        assert cron_task.TASKS[0][2]["id"] == "keep0001" and cron_task.TASKS[1][2]["id"]
+    finally:
+        cron_task.task_db.close()